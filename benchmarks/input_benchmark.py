@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+################################################################################
+# Input pipeline benchmark: keyboard -> draw_text -> present, under a replayed or synthetic input load
+################################################################################
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from threading import Event, Thread
+
+# Headless: no window is ever opened
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+import pygame as pg
+
+from device.input_log import TimedInput, read_input_log, replay_inputs, write_input_log
+from device.synthetic_input import merge_inputs, synthetic_mouse_motion, synthetic_typing
+from screen.screen import Screen
+from screen_benchmark import FONT_PATH, RESOLUTIONS, git_commit
+from util.compute_backend import get_backend, registered_backends
+
+################################################################################
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    samples_ms = np.asarray(samples) * 1e3
+    return {
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p90_ms": float(np.percentile(samples_ms, 90)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+        "max_ms": float(samples_ms.max()),
+    }
+
+# --------------------------------------------------------------------------------
+def run(screen: Screen, inputs: list[TimedInput], realtime: bool, speed: float) -> dict:
+    """
+    Replay inputs into the screen's devices while a consumer thread draws every key pressed and accepts a frame per
+    batch of keys, as examples/keyboard/typing.py does, and the calling thread presents the frames.
+    """
+    keyboard = screen.input_devices["keyboard"]
+    font = pg.font.Font(str(FONT_PATH), 15)
+    color = screen.xp.asarray([255, 255, 255])
+    replay_done = Event()
+    input_to_accept: list[float] = []
+    keys_drawn = [0]
+    frames = [0]
+
+    def replay():
+        replay_inputs(inputs, screen.input_devices, realtime, speed)
+        replay_done.set()
+
+    def consume():
+        write_pos = [10, 10]
+        while True:
+            events = keyboard.read_many(block=True, timeout=0.1)
+            if not events:
+                if replay_done.is_set():
+                    return
+                continue
+            presses = [event for event in events if event.pressed]
+            for event in presses:
+                if write_pos[1] > screen.resolution.height - 30:
+                    write_pos = [10, 10]
+                screen.draw_text(event.name * event.repeat, write_pos[0], write_pos[1], color, font=font,
+                                 next_write_position=write_pos)
+            if presses:
+                screen.accept_frame()
+                accepted_at = time.perf_counter()
+                input_to_accept.extend(accepted_at - event.timestamp for event in presses)
+                keys_drawn[0] += sum(event.repeat for event in presses)
+                frames[0] += 1
+            # Mouse inputs are only buffered, like an application that polls mouse.state
+            screen.input_devices["mouse"].clear()
+
+    screen.metrics.clear()
+    start = time.perf_counter()
+    threads = [Thread(target=replay, daemon=True), Thread(target=consume, daemon=True)]
+    for thread in threads:
+        thread.start()
+    while threads[1].is_alive():
+        screen.step()
+        screen.clock.tick(screen.refresh_rate)
+    screen.step()
+    elapsed = time.perf_counter() - start
+
+    key_presses = sum(1 for _, device, input_ in inputs if device == "keyboard" and input_.pressed)
+    return {
+        "inputs": len(inputs),
+        "key_presses": key_presses,
+        "keys_drawn": keys_drawn[0],
+        "frames_accepted": frames[0],
+        "seconds": elapsed,
+        "keys_per_sec": keys_drawn[0] / elapsed,
+        "input_to_accept": percentiles(input_to_accept),
+        # Frame metrics are in milliseconds
+        "accept_to_present": percentiles(list(screen.metrics.samples("latency") / 1e3)),
+        "keyboard_buffer": keyboard.buffer.stats(),
+        "mouse_buffer": screen.input_devices["mouse"].buffer.stats(),
+    }
+
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the keyboard -> draw_text -> present pipeline")
+    parser.add_argument("--resolution", choices=RESOLUTIONS, default="720p")
+    parser.add_argument("--hz", type=int, default=120, help="Refresh rate of the screen")
+    parser.add_argument("--log", type=Path, help="Replay this input log instead of synthetic input")
+    parser.add_argument("--key-rate", type=float, default=500, help="Synthetic keys per second")
+    parser.add_argument("--keys", type=int, default=2000, help="Number of synthetic keys")
+    parser.add_argument("--mouse-rate", type=float, default=0, help="Synthetic mouse motions per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-log", type=Path, help="Write the synthetic input to this log, to replay it later")
+    parser.add_argument("--fast", action="store_true", help="Replay as fast as possible instead of in real time")
+    parser.add_argument("--speed", type=float, default=1.0, help="Real time replay speed factor")
+    parser.add_argument("--backend", choices=registered_backends() + ["auto"],
+                        help="Compute backend, the default one if not given")
+    parser.add_argument("--output", type=Path, default=Path("input_benchmark_results.json"))
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    if args.log:
+        inputs = list(read_input_log(args.log))
+    else:
+        streams = [synthetic_typing(args.key_rate, args.keys, seed=args.seed)]
+        if args.mouse_rate:
+            duration = args.keys / args.key_rate
+            streams.append(synthetic_mouse_motion(args.mouse_rate, int(duration * args.mouse_rate), (width, height),
+                                                  seed=args.seed))
+        inputs = list(merge_inputs(*streams))
+        if args.save_log:
+            write_input_log(args.save_log, inputs)
+
+    pg.font.init()
+    backend = get_backend(args.backend)
+    screen = Screen(height=height, width=width, hz=args.hz, headless=True, backend=backend)
+    screen.power_on(blocking=False)
+    result = run(screen, inputs, not args.fast, args.speed)
+    screen.power_off()
+
+    print(f"{result['keys_drawn']} keys drawn in {result['frames_accepted']} frames, {result['seconds']:.2f} s, "
+          f"{result['keys_per_sec']:.0f} keys/s")
+    for phase in ("input_to_accept", "accept_to_present"):
+        stats = result[phase]
+        if stats:
+            print(f"{phase:<18} p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms   "
+                  f"max {stats['max_ms']:8.3f} ms")
+    print(f"keyboard buffer    {result['keyboard_buffer']}")
+
+    args.output.write_text(json.dumps({
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backend": backend.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "log": str(args.log) if args.log else None,
+            "realtime": not args.fast,
+        },
+        "result": result,
+    }, indent=2))
+    print(f"Results written to {args.output}")
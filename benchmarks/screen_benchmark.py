@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+################################################################################
+# Rendering benchmarks: throughput and latency of every Screen primitive
+################################################################################
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# Headless: no window is ever opened
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+import pygame as pg
+
+from screen.frame_transfer import TRANSFERS
+from screen.screen import Screen
+from util.compute_backend import ComputeBackend, get_backend, registered_backends
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+FONT_PATH = Path(__file__).parent.parent / "examples" / "resource" / "font" / "Urbanist" / "static" / "Urbanist-Regular.ttf"
+
+################################################################################
+def measure(operation: Callable[[], None], iterations: int, warmup: int, backend: ComputeBackend,
+            setup: Optional[Callable[[], None]] = None) -> dict[str, float]:
+    """
+    Time each call of operation (setup excluded) and summarize the latencies.
+    The backend is synchronized, so that timings include the GPU work and not only its launch.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        operation()
+    backend.synchronize()
+
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        if setup:
+            setup()
+            backend.synchronize()
+        start = time.perf_counter_ns()
+        operation()
+        backend.synchronize()
+        latencies[i] = time.perf_counter_ns() - start
+
+    latencies_ms = latencies / 1e6
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / (latencies.sum() / 1e9),
+        "mean_ms": float(latencies_ms.mean()),
+        "min_ms": float(latencies_ms.min()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p90_ms": float(np.percentile(latencies_ms, 90)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+    }
+
+# --------------------------------------------------------------------------------
+def build_cases(screen: Screen, export_dir: Path) -> dict[str, tuple[Callable[[], None], Optional[Callable[[], None]]]]:
+    """Benchmark cases: name -> (operation, untimed setup)."""
+    width, height = screen.resolution.width, screen.resolution.height
+    color = screen.xp.asarray([200, 120, 40])
+    font = pg.font.Font(str(FONT_PATH), 24)
+    counter = iter(range(10 ** 9))
+
+    def point():
+        return random.randrange(width), random.randrange(height)
+
+    def points(count: int):
+        return screen.xp.asarray([[random.randrange(width), random.randrange(height)] for _ in range(count)])
+
+    def new_frame():
+        # Each drawing starts a frame of its own: dirty regions don't pile up from one iteration to the next
+        screen.accept_frame()
+
+    def full_frame_update():
+        # A whole dirty frame, as after a clear()
+        screen.fill(color)
+        screen.accept_frame()
+
+    def at_brightness(brightness: float):
+        def setup():
+            if screen.brightness != brightness:
+                screen.set_backlight(brightness)
+                screen.update()
+            full_frame_update()
+        return setup
+
+    return {
+        "set_pixel": (lambda: screen.set_pixel(*point(), color), new_frame),
+        "fill": (lambda: screen.fill(color), new_frame),
+        "draw_line": (lambda: screen.draw_line(*point(), *point(), color), new_frame),
+        "draw_lines_1000": (lambda: screen.draw_lines(points(2000).reshape(-1, 4), color), new_frame),
+        "scroll": (lambda: screen.scroll(0, -24), new_frame),
+        "copy_region": (lambda: screen.copy_region((0, 0, width // 2, height // 2), point()), new_frame),
+        "draw_rectangle": (lambda: screen.draw_rectangle(*point(), width // 4, height // 4, color), new_frame),
+        "draw_rectangle_filled": (lambda: screen.draw_rectangle(*point(), width // 4, height // 4, color, fill=True),
+                                  new_frame),
+        "draw_arc": (lambda: screen.draw_arc(*point(), height // 8, 30, 300, color), new_frame),
+        "draw_arcs_40": (lambda: screen.draw_arcs(points(40), height // 16, [30, 300], color, thickness=3), new_frame),
+        "draw_arc_pie": (lambda: screen.draw_arc(*point(), height // 8, 30, 120, color, pie=True), new_frame),
+        "draw_ellipse_filled": (lambda: screen.draw_ellipse(*point(), width // 10, height // 10, color, -1), new_frame),
+        "draw_ellipse_outlined": (lambda: screen.draw_ellipse(*point(), width // 10, height // 10, color, 3),
+                                  new_frame),
+        "draw_quadratic_bezier": (lambda: screen.draw_quadratic_bezier(*point(), *point(), *point(), color), new_frame),
+        "draw_cubic_bezier": (lambda: screen.draw_cubic_bezier(*point(), *point(), *point(), *point(), color),
+                              new_frame),
+        "draw_cubic_beziers_100": (lambda: screen.draw_cubic_beziers(points(400).reshape(-1, 8), color), new_frame),
+        "draw_text": (lambda: screen.draw_text(f"counter {next(counter)}", *point(), color, font=font), new_frame),
+        "draw_text_rendered_hit": (lambda: screen.draw_text("Cached text", *point(), color, font=font, kerning=True),
+                                   new_frame),
+        "draw_text_rendered_miss": (lambda: screen.draw_text(f"counter {next(counter)}", *point(), color, font=font,
+                                                             kerning=True), new_frame),
+        "update_brightness_1.0": (screen.update, at_brightness(1.0)),
+        "update_brightness_0.5": (screen.update, at_brightness(0.5)),
+        # End to end: a whole frame drawn, accepted and presented, as for fill(), clear(), scroll() or animations
+        "fill_present_full_frame": (lambda: (screen.fill(color), screen.accept_frame(), screen.update()),
+                                    at_brightness(1.0)),
+        "export_frame": (lambda: screen.export_frame(export_dir / "frame.png"), None),
+    }
+
+# --------------------------------------------------------------------------------
+def run(resolutions: list[str], cases: Optional[list[str]], iterations: int, warmup: int,
+        backend: ComputeBackend, transfer: Optional[str] = None) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as export_dir:
+        for name in resolutions:
+            width, height = RESOLUTIONS[name]
+            screen = Screen(height=height, width=width, hz=0, headless=True, backend=backend, transfer=transfer)
+            screen.power_on(blocking=False)
+
+            for case, (operation, setup) in build_cases(screen, Path(export_dir)).items():
+                if cases and case not in cases:
+                    continue
+                random.seed(0)
+                stats = measure(operation, iterations, warmup, backend, setup)
+                results.append({"case": case, "resolution": name, "width": width, "height": height, **stats})
+                print(f"{name:>6} {case:<26} {stats['ops_per_sec']:>12.1f} ops/s   "
+                      f"p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms")
+
+            screen.power_off()
+    return results
+
+# --------------------------------------------------------------------------------
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --------------------------------------------------------------------------------
+def compare(results: list[dict], baseline_path: Path):
+    """Print the throughput of each case relative to a previous run."""
+    baseline = {(r["case"], r["resolution"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    print(f"\nCompared to {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["case"], result["resolution"]))
+        if previous:
+            ratio = result["ops_per_sec"] / previous["ops_per_sec"]
+            print(f"{result['resolution']:>6} {result['case']:<26} x{ratio:.2f}")
+
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rendering primitives of the screen")
+    parser.add_argument("--resolutions", nargs="+", choices=RESOLUTIONS, default=list(RESOLUTIONS))
+    parser.add_argument("--cases", nargs="+", help="Only run these cases")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--compare", type=Path, help="A previous output file to compare with")
+    parser.add_argument("--backend", choices=registered_backends() + ["auto"],
+                        help="Compute backend, the default one if not given")
+    parser.add_argument("--transfer", choices=TRANSFERS, help="Frame transfer, the backend's one if not given")
+    args = parser.parse_args()
+
+    pg.font.init()
+    backend = get_backend(args.backend)
+    results = run(args.resolutions, args.cases, args.iterations, args.warmup, backend, args.transfer)
+
+    args.output.write_text(json.dumps({
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backend": backend.name,
+            "transfer": args.transfer,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -3,7 +3,6 @@
 ################################################################################
 # Display typed characters on screen
 ################################################################################
-import time
 from pathlib import Path
 from threading import Thread
 
@@ -26,12 +25,15 @@ def typing():
     font = pg.font.Font(font_path, 15)
     write_pos = [10, 10]
     while screen.is_on:
-        char = screen.input_devices["keyboard"].read()
-        if char:
-            print(f"You pressed {char}")
-            screen.draw_text(f"{char}", write_pos[0], write_pos[1], hex_to_rgb("#ffffff"), font=font,
-                             next_write_position=write_pos).accept_frame()
-        time.sleep(1/60)
+        # Wakes up as soon as a key is pressed, the timeout only lets the loop notice that the screen was turned off
+        events = screen.input_devices["keyboard"].read_many(block=True, timeout=0.5)
+        presses = [event for event in events if event.pressed]
+        for event in presses:
+            print(f"You pressed {event.name}")
+            screen.draw_text(f"{event.name}" * event.repeat, write_pos[0], write_pos[1], hex_to_rgb("#ffffff"),
+                             font=font, next_write_position=write_pos)
+        if presses:
+            screen.accept_frame()
 
 ################################################################################
 # Run screen commands in a separate thread
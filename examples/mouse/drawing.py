@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+################################################################################
+# Draw with the mouse while the left button is held down
+################################################################################
+from threading import Thread
+
+from device.mouse import MouseButton, MouseMotion
+from examples.util.screen_usage import wait_for_screen
+from screen.screen import Screen
+from util.colors import hex_to_rgb
+
+################################################################################
+screen: Screen = Screen(height=720, width=1280, hz=120, brightness=1)
+
+# --------------------------------------------------------------------------------
+def drawing():
+    wait_for_screen(screen)
+
+    mouse = screen.input_devices["mouse"]
+    color = hex_to_rgb("#ffffff")
+    while screen.is_on:
+        # Bursts of motion arrive as one record per frame, with the movement accumulated in rel
+        inputs = mouse.read_many(block=True, timeout=0.5)
+        for input_ in inputs:
+            if isinstance(input_, MouseMotion) and input_.buttons[0]:
+                x, y = input_.pos
+                screen.draw_lines([[x - input_.rel[0], y - input_.rel[1], x, y]], color)
+            elif isinstance(input_, MouseButton) and input_.pressed:
+                print(f"Button {input_.button} pressed at {input_.pos}")
+        if inputs:
+            screen.accept_frame()
+
+################################################################################
+# Run screen commands in a separate thread
+Thread(target=drawing, daemon=True).start()
+
+# This is a blocking call
+screen.power_on()
+
+print("Shutdown")
@@ -18,6 +18,9 @@ print(f"The screen has a ratio of {screen.resolution.ratio}")
 def animation_ellipse_radius():
     wait_for_screen(screen)
     if screen.is_on:
+        # The background is drawn once, the ellipse in its own layer
+        screen.fill(hex_to_rgb("#202040"))
+        screen.add_layer("ellipse")
         rx, ry = 150, 50
         speedx = 500  # pixels per second
         speedy = 500  # pixels per second
@@ -58,10 +61,15 @@ def animation_ellipse_radius():
             # Drawing operations
             if not screen.is_on:
                 break
-            screen.draw_ellipse(640, 360, rx, ry, hex_to_rgb("#ffffff"), thickness=-1).accept_frame()
+            with screen.layer("ellipse"):
+                screen.draw_ellipse(640, 360, rx, ry, hex_to_rgb("#ffffff"), thickness=-1)
+            # Only the region of the ellipse is composited again
+            screen.accept_frame()
             time.sleep(1/screen.refresh_rate)
-            screen.clear()
-            # screen.draw_ellipse(x, y, 100, 50, hex_to_rgb("#ffffff"))
+            with screen.layer("ellipse"):
+                # Black is the transparent color of the layer
+                screen.draw_rectangle(640 - rx - 1, 360 - ry - 1, 2 * rx + 3, 2 * ry + 3, hex_to_rgb("#000000"),
+                                      fill=True)
 
 ################################################################################
 # Run screen commands in a separate thread
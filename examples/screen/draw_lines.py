@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+################################################################################
+# Draw batches of lines and a polyline
+################################################################################
+import time
+from threading import Thread
+
+from examples.util.screen_usage import wait_for_screen
+from screen.screen import Screen
+from util.colors import random_color_rgb
+
+################################################################################
+screen = Screen(height=720, width=1280, hz=120, brightness=1)
+print(f"The screen has a ratio of {screen.resolution.ratio}")
+
+# --------------------------------------------------------------------------------
+def draw_lines():
+    wait_for_screen(screen)
+    while screen.is_on:
+        count = 1000
+        segments = screen.xp.random.randint(-100, screen.resolution.width + 100, (count, 4))
+        segments[:, 1::2] %= screen.resolution.height
+        colors = screen.xp.stack([random_color_rgb(screen.backend) for _ in range(count)])
+        screen.clear()
+        screen.draw_lines(segments, colors)
+        screen.draw_polyline([[100, 600], [300, 400], [500, 650], [700, 380]], random_color_rgb(screen.backend)).accept_frame()
+        print(f"Drew {count} lines and a polyline")
+        time.sleep(1)
+
+################################################################################
+# Run screen commands in a separate thread
+Thread(target=draw_lines, daemon=True).start()
+
+# This is a blocking call
+screen.power_on()
+
+print("Shutdown")
@@ -1,28 +1,130 @@
 ################################################################################
+import asyncio
 from abc import ABC
-from queue import Queue, Empty
-from typing import Optional
+from threading import Lock
+from typing import Any, AsyncIterator, Callable, Optional
+
+from device.ring_buffer import OverflowPolicy, RingBuffer
 
 ################################################################################
 class InputDevice(ABC):
+    """
+    Inputs written by the screen (Screen.handle_events) and read by consumers, either:
+    - by reading them, blocking until one arrives if needed: read(), read_many()
+    - from asyncio: await read_async(), or async for input_ in device
+    - with listeners, called with every input as soon as it is written
+    Inputs are kept in a fixed-capacity ring buffer written by one thread and read by one thread. When it is full,
+    policy decides what is lost (see OverflowPolicy) and buffer.stats() counts it.
+    """
+
+    def __init__(self, capacity: int = 256, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 coalesce: Optional[Callable[[Any, Any], Optional[Any]]] = None):
+        self.buffer = RingBuffer(capacity, policy, coalesce)
+        self._listeners: list[Callable[[Any], None]] = []
+        # asyncio readers waiting for an input, woken up from the writing thread
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._waiters_lock = Lock()
+
+    # --------------------------------------------------------------------------------
+    def write(self, input_: Any):
+        """Buffer an input and call the listeners with it, synchronously: this thread waits for all of them."""
+        self.buffer.put(input_)
+
+        for listener in list(self._listeners):
+            listener(input_)
+        self._wake_async_waiters()
+
+    # --------------------------------------------------------------------------------
+    def flush(self):
+        """Publish the inputs held back while the screen handles its events. Called once all of them are written."""
+        pass
+
+    # --------------------------------------------------------------------------------
+    def read(self, block: bool = False, timeout: Optional[float] = None) -> Optional[Any]:
+        """The oldest input. With block=True, wait for one at most timeout seconds (forever if None)."""
+        return self.buffer.get(block, timeout)
+
+    # --------------------------------------------------------------------------------
+    def read_many(self, n: Optional[int] = None, block: bool = False, timeout: Optional[float] = None) -> list[Any]:
+        """
+        Up to n inputs (all of them if n is None), oldest first.
+        With block=True, wait at most timeout seconds for the first one.
+        """
+        first = self.read(block, timeout)
+        if first is None:
+            return []
+
+        inputs = [first]
+        while n is None or len(inputs) < n:
+            input_ = self.read()
+            if input_ is None:
+                break
+            inputs.append(input_)
+        return inputs
 
-    def __init__(self):
-        self.maxsize: int = -1
-        self.queue: Queue = Queue(maxsize=self.maxsize)
+    # --------------------------------------------------------------------------------
+    async def read_async(self) -> Any:
+        """Wait for the next input without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            input_ = self.read()
+            if input_ is not None:
+                return input_
+
+            future = loop.create_future()
+            with self._waiters_lock:
+                self._async_waiters.append((loop, future))
+            # An input written before the waiter was registered wouldn't wake it up
+            input_ = self.read()
+            if input_ is not None:
+                self._remove_async_waiter(future)
+                return input_
+            try:
+                await future
+            finally:
+                self._remove_async_waiter(future)
+
+    # --------------------------------------------------------------------------------
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    # --------------------------------------------------------------------------------
+    async def __anext__(self) -> Any:
+        return await self.read_async()
 
     # --------------------------------------------------------------------------------
-    def write(self, input_: str):
-        if not self.queue.qsize() < self.maxsize:
-            self.queue.put(input_)
+    def _remove_async_waiter(self, future: asyncio.Future):
+        with self._waiters_lock:
+            self._async_waiters = [(loop, waiter) for loop, waiter in self._async_waiters if waiter is not future]
 
     # --------------------------------------------------------------------------------
-    def read(self, block: bool = False) -> Optional[str]:
-        try:
-            return self.queue.get(block=block)
-        except Empty:
-            return None
+    def _wake_async_waiters(self):
+        with self._waiters_lock:
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve, future)
 
+    # --------------------------------------------------------------------------------
+    @staticmethod
+    def _resolve(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    # --------------------------------------------------------------------------------
+    def add_listener(self, listener: Callable[[Any], None]):
+        """
+        Call listener with every input, synchronously from the thread that writes it: the screen's refresh thread,
+        in handle_events(), before the frame is presented. A listener holds up the refresh and the inputs after it
+        until it returns, so it must be short and must never wait for a frame to be presented. Drawing and
+        set_backlight() are fine there, but accept_frame() doesn't wait for a free buffer on this thread: it drops
+        the oldest frame that wasn't presented yet. Heavier work belongs on a consumer thread reading the device.
+        """
+        self._listeners.append(listener)
 
+    # --------------------------------------------------------------------------------
+    def remove_listener(self, listener: Callable[[Any], None]):
+        self._listeners.remove(listener)
+
+    # --------------------------------------------------------------------------------
     def clear(self):
-        with self.queue.mutex:
-            self.queue.queue.clear()
+        self.buffer.clear()
@@ -0,0 +1,166 @@
+################################################################################
+import struct
+import time
+from os import PathLike
+from threading import Event, Lock
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Mapping, Optional
+
+from device.input_device import InputDevice
+from device.keyboard import KeyEvent
+from device.mouse import MouseButton, MouseMotion, MouseWheel
+
+_MAGIC = b"VCIL"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBB")  # magic, version, device count, then every device name
+_RECORD_HEADER = struct.Struct("<dBB")  # seconds since the start, device index, input type
+_KEY = struct.Struct("<iH?H")  # key, modifiers, pressed, repeat, then the name and the typed text
+_MOTION = struct.Struct("<hhiiBH")  # x, y, relative x, relative y, buttons bitmask, count
+_BUTTON = struct.Struct("<Bhh?")  # button, x, y, pressed
+_WHEEL = struct.Struct("<ii")  # x, y
+
+_KEY_EVENT, _MOUSE_MOTION, _MOUSE_BUTTON, _MOUSE_WHEEL = range(4)
+
+# A recorded input: seconds since the recording started, device name, input
+TimedInput = tuple[float, str, Any]
+
+################################################################################
+class InputRecorder:
+    """
+    Records the inputs written to devices into a compact binary log, read back with read_input_log().
+    Every input is stored with the time it became readable, relative to the start of the recording, so the log is
+    in time order. The mouse is recorded after its motion coalescing: a replay reproduces what consumers read, not
+    the raw pygame events.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, path: str | PathLike[str], devices: Mapping[str, InputDevice]):
+        self.path = path
+        self.inputs_recorded = 0
+        self._device_indices = {name: index for index, name in enumerate(devices)}
+        self._start = time.perf_counter()
+        self._lock = Lock()
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, len(devices)))
+        for name in devices:
+            self._file.write(_pack_string(name))
+
+        self._listeners: list[tuple[InputDevice, Callable[[Any], None]]] = []
+        for name, device in devices.items():
+            listener = (lambda input_, device_name=name: self.record(device_name, input_))
+            device.add_listener(listener)
+            self._listeners.append((device, listener))
+
+    # --------------------------------------------------------------------------------
+    def record(self, device_name: str, input_: Any):
+        """Append an input received by a device. Called by the listeners of the devices."""
+        data = _encode(input_)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD_HEADER.pack(time.perf_counter() - self._start,
+                                                 self._device_indices[device_name], data[0]))
+            self._file.write(data[1])
+            self.inputs_recorded += 1
+
+    # --------------------------------------------------------------------------------
+    def close(self):
+        """Stop listening to the devices and close the log."""
+        for device, listener in self._listeners:
+            device.remove_listener(listener)
+        self._listeners = []
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+# --------------------------------------------------------------------------------
+def write_input_log(path: str | PathLike[str], inputs: Iterable[TimedInput]):
+    """Write inputs, e.g. synthetic ones, as a log that replays like a recording."""
+    inputs = list(inputs)
+    device_indices = {name: index for index, name in enumerate(dict.fromkeys(name for _, name, _ in inputs))}
+    with open(path, "wb") as file:
+        file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, len(device_indices)))
+        for name in device_indices:
+            file.write(_pack_string(name))
+        for seconds, name, input_ in inputs:
+            input_type, data = _encode(input_)
+            file.write(_RECORD_HEADER.pack(seconds, device_indices[name], input_type))
+            file.write(data)
+
+# --------------------------------------------------------------------------------
+def read_input_log(path: str | PathLike[str]) -> Iterator[TimedInput]:
+    """Inputs of a log: seconds since the recording started, device name and input, in recording order."""
+    with open(path, "rb") as file:
+        magic, version, device_count = _FILE_HEADER.unpack(file.read(_FILE_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not an input log")
+        device_names = [_read_string(file) for _ in range(device_count)]
+
+        while header := file.read(_RECORD_HEADER.size):
+            seconds, device_index, input_type = _RECORD_HEADER.unpack(header)
+            yield seconds, device_names[device_index], _decode(file, input_type)
+
+# --------------------------------------------------------------------------------
+def replay_inputs(inputs: Iterable[TimedInput], devices: Mapping[str, InputDevice], realtime: bool = True,
+                  speed: float = 1.0, stop: Optional[Event] = None) -> int:
+    """
+    Write inputs into the devices, e.g. those of a headless screen, and return how many were written.
+    With realtime=True, every input is written at its time (divided by speed) since the start of the replay,
+    otherwise as fast as possible. Inputs are timestamped when they are written.
+    Stops early when stop is set.
+    """
+    start = time.perf_counter()
+    count = 0
+    for seconds, device_name, input_ in inputs:
+        if stop is not None and stop.is_set():
+            break
+        if realtime:
+            delay = start + seconds / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        device = devices[device_name]
+        device.write(input_._replace(timestamp=time.perf_counter()))
+        # Recorded motions were already coalesced
+        device.flush()
+        count += 1
+    return count
+
+# --------------------------------------------------------------------------------
+def _encode(input_: Any) -> tuple[int, bytes]:
+    if isinstance(input_, KeyEvent):
+        return _KEY_EVENT, (_KEY.pack(input_.key, input_.modifiers, input_.pressed, min(input_.repeat, 0xFFFF))
+                            + _pack_string(input_.name) + _pack_string(input_.unicode))
+    if isinstance(input_, MouseMotion):
+        buttons = sum(1 << i for i, pressed in enumerate(input_.buttons) if pressed)
+        return _MOUSE_MOTION, _MOTION.pack(*input_.pos, *input_.rel, buttons, min(input_.count, 0xFFFF))
+    if isinstance(input_, MouseButton):
+        return _MOUSE_BUTTON, _BUTTON.pack(input_.button, *input_.pos, input_.pressed)
+    if isinstance(input_, MouseWheel):
+        return _MOUSE_WHEEL, _WHEEL.pack(input_.x, input_.y)
+    raise TypeError(f"Inputs of type {type(input_).__name__} can't be recorded")
+
+# --------------------------------------------------------------------------------
+def _decode(file: BinaryIO, input_type: int) -> Any:
+    if input_type == _KEY_EVENT:
+        key, modifiers, pressed, repeat = _KEY.unpack(file.read(_KEY.size))
+        name = _read_string(file)
+        return KeyEvent(key, name, modifiers, pressed, 0., _read_string(file), repeat)
+    if input_type == _MOUSE_MOTION:
+        x, y, rel_x, rel_y, buttons, count = _MOTION.unpack(file.read(_MOTION.size))
+        return MouseMotion((x, y), (rel_x, rel_y), tuple(bool(buttons >> i & 1) for i in range(3)), 0., count)
+    if input_type == _MOUSE_BUTTON:
+        button, x, y, pressed = _BUTTON.unpack(file.read(_BUTTON.size))
+        return MouseButton(button, (x, y), pressed, 0.)
+    if input_type == _MOUSE_WHEEL:
+        return MouseWheel(*_WHEEL.unpack(file.read(_WHEEL.size)), 0.)
+    raise ValueError(f"Unknown input type {input_type} in the input log")
+
+# --------------------------------------------------------------------------------
+def _pack_string(string: str) -> bytes:
+    data = string.encode("utf-8")[:255]
+    return bytes((len(data),)) + data
+
+# --------------------------------------------------------------------------------
+def _read_string(file: BinaryIO) -> str:
+    return file.read(file.read(1)[0]).decode("utf-8", errors="replace")
@@ -1,9 +1,41 @@
 ################################################################################
+import time
+from typing import NamedTuple, Optional
+
+import pygame as pg
 from device.input_device import InputDevice
+from device.ring_buffer import OverflowPolicy
+
+################################################################################
+class KeyEvent(NamedTuple):
+    key: int  # pygame key code (pg.K_*)
+    name: str  # pg.key.name(key)
+    modifiers: int  # pygame modifier flags (pg.KMOD_*)
+    pressed: bool  # False when the key is released
+    timestamp: float  # time.perf_counter() when the screen received it
+    unicode: str = ""  # Text typed by a key press, if any
+    repeat: int = 1  # Number of identical events coalesced into this one
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_pygame(cls, event: pg.event.Event) -> "KeyEvent":
+        return cls(event.key, pg.key.name(event.key), event.mod, event.type == pg.KEYDOWN, time.perf_counter(),
+                   getattr(event, "unicode", ""))
+
+    # --------------------------------------------------------------------------------
+    def coalesce(self, other: "KeyEvent") -> Optional["KeyEvent"]:
+        """This event repeated by other (same key, modifiers and state), None if other is a different event."""
+        if (other.key, other.modifiers, other.pressed) != (self.key, self.modifiers, self.pressed):
+            return None
+        return self._replace(timestamp=other.timestamp, repeat=self.repeat + other.repeat)
 
 ################################################################################
 class Keyboard(InputDevice):
+    """
+    KeyEvent inputs, for key presses and releases.
+    When the buffer is full, repeats of the newest key are counted in its repeat field instead of taking room.
+    """
 
     # --------------------------------------------------------------------------------
-    def __init__(self):
-        super().__init__()
+    def __init__(self, capacity: int = 256, policy: OverflowPolicy = OverflowPolicy.COALESCE):
+        super().__init__(capacity, policy, KeyEvent.coalesce)
@@ -0,0 +1,104 @@
+################################################################################
+import time
+from typing import Any, NamedTuple, Optional
+
+import pygame as pg
+from device.input_device import InputDevice
+from device.ring_buffer import OverflowPolicy
+
+################################################################################
+class MouseMotion(NamedTuple):
+    pos: tuple[int, int]  # Latest position
+    rel: tuple[int, int]  # Movement since the previous motion record
+    buttons: tuple[bool, bool, bool]  # Left, middle and right buttons held down
+    timestamp: float  # time.perf_counter() of the latest motion
+    count: int = 1  # Number of pygame motion events merged into this record
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_pygame(cls, event: pg.event.Event) -> "MouseMotion":
+        return cls(tuple(event.pos), tuple(event.rel), tuple(bool(b) for b in event.buttons), time.perf_counter())
+
+    # --------------------------------------------------------------------------------
+    def coalesce(self, other: Any) -> Optional["MouseMotion"]:
+        """This motion followed by other, None if other isn't a motion."""
+        if not isinstance(other, MouseMotion):
+            return None
+        return MouseMotion(other.pos, (self.rel[0] + other.rel[0], self.rel[1] + other.rel[1]), other.buttons,
+                           other.timestamp, self.count + other.count)
+
+################################################################################
+class MouseButton(NamedTuple):
+    button: int  # 1: left, 2: middle, 3: right, ...
+    pos: tuple[int, int]
+    pressed: bool  # False when the button is released
+    timestamp: float
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_pygame(cls, event: pg.event.Event) -> "MouseButton":
+        return cls(event.button, tuple(event.pos), event.type == pg.MOUSEBUTTONDOWN, time.perf_counter())
+
+################################################################################
+class MouseWheel(NamedTuple):
+    x: int
+    y: int  # Positive away from the user
+    timestamp: float
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_pygame(cls, event: pg.event.Event) -> "MouseWheel":
+        return cls(event.x, event.y, time.perf_counter())
+
+################################################################################
+class PointerState(NamedTuple):
+    pos: tuple[int, int]
+    buttons: tuple[bool, bool, bool]  # Left, middle and right buttons held down
+    wheel: tuple[int, int]  # Total wheel scroll
+    timestamp: float  # time.perf_counter() of the latest input
+
+################################################################################
+class Mouse(InputDevice):
+    """
+    MouseMotion, MouseButton and MouseWheel inputs.
+    Motion events are merged until another kind of input arrives or the screen is done handling its events, so
+    consumers get at most one motion record per frame with the latest position and the accumulated movement.
+    For per-frame polling, state is the pointer state after the latest input.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, capacity: int = 256, policy: OverflowPolicy = OverflowPolicy.COALESCE):
+        super().__init__(capacity, policy, self._coalesce)
+        # Replaced whole, never mutated: reading it from another thread is always consistent
+        self.state = PointerState((0, 0), (False, False, False), (0, 0), 0.)
+        self._motion: Optional[MouseMotion] = None
+
+    # --------------------------------------------------------------------------------
+    @staticmethod
+    def _coalesce(newest: Any, input_: Any) -> Optional[Any]:
+        return newest.coalesce(input_) if isinstance(newest, MouseMotion) else None
+
+    # --------------------------------------------------------------------------------
+    def write(self, input_: Any):
+        state = self.state
+        if isinstance(input_, MouseMotion):
+            self._motion = input_ if self._motion is None else self._motion.coalesce(input_)
+            self.state = state._replace(pos=input_.pos, buttons=input_.buttons, timestamp=input_.timestamp)
+            return
+
+        self.flush()
+        if isinstance(input_, MouseButton):
+            buttons = state.buttons
+            if 1 <= input_.button <= len(buttons):
+                buttons = buttons[:input_.button - 1] + (input_.pressed,) + buttons[input_.button:]
+            self.state = state._replace(pos=input_.pos, buttons=buttons, timestamp=input_.timestamp)
+        elif isinstance(input_, MouseWheel):
+            self.state = state._replace(wheel=(state.wheel[0] + input_.x, state.wheel[1] + input_.y),
+                                        timestamp=input_.timestamp)
+        super().write(input_)
+
+    # --------------------------------------------------------------------------------
+    def flush(self):
+        if self._motion is not None:
+            motion, self._motion = self._motion, None
+            super().write(motion)
@@ -0,0 +1,130 @@
+################################################################################
+import time
+from enum import Enum
+from threading import Condition
+from typing import Any, Callable, Optional
+
+################################################################################
+class OverflowPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"  # The new item overwrites the oldest unread one
+    DROP_NEWEST = "drop_newest"  # The new item is discarded
+    COALESCE = "coalesce"  # The new item is merged into the newest unread one if possible, else drops the oldest
+
+################################################################################
+class RingBuffer:
+    """
+    Fixed-capacity FIFO for one producer thread and one consumer thread, preallocated once.
+    Writing and reading only move two counters, without locking: the lock is only taken to wake a blocked reader.
+    Items can't be None.
+    coalesce(newest, new) returns the merge of two items, or None if they can't be merged (COALESCE policy).
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, capacity: int, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 coalesce: Optional[Callable[[Any, Any], Optional[Any]]] = None):
+        if capacity < 1:
+            raise ValueError(f"A ring buffer needs a capacity of at least 1, got {capacity}")
+
+        self.capacity = capacity
+        self.policy = policy
+        self._coalesce = coalesce
+        # (index, item) pairs, replaced whole: a reader always sees an item together with the index it was written at
+        self._slots: list[tuple[int, Any]] = [(-1, None)] * capacity
+        # Total number of items written and read. Only the producer moves _tail, only the consumer moves _head.
+        self._tail = 0
+        self._head = 0
+        self._not_empty = Condition()
+        self._waiting = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    # --------------------------------------------------------------------------------
+    @property
+    def overflows(self) -> int:
+        """Number of items written while the buffer was full."""
+        return self.dropped + self.coalesced
+
+    # --------------------------------------------------------------------------------
+    def put(self, item: Any) -> bool:
+        """Add an item, False if it was discarded because the buffer is full."""
+        tail = self._tail
+        if tail - self._head >= self.capacity:
+            if self.policy is OverflowPolicy.DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.policy is OverflowPolicy.COALESCE and self._coalesce is not None:
+                newest = (tail - 1) % self.capacity
+                merged = self._coalesce(self._slots[newest][1], item)
+                if merged is not None:
+                    self._slots[newest] = (tail - 1, merged)
+                    self.coalesced += 1
+                    return True
+            # The reader skips the overwritten item
+            self.dropped += 1
+
+        self._slots[tail % self.capacity] = (tail, item)
+        self._tail = tail + 1
+        self.written += 1
+
+        if self._waiting:
+            with self._not_empty:
+                self._not_empty.notify_all()
+        return True
+
+    # --------------------------------------------------------------------------------
+    def _pop(self) -> Optional[Any]:
+        head = self._head
+        while True:
+            tail = self._tail
+            if head >= tail:
+                return None
+            # Items overwritten by the producer are skipped
+            head = max(head, tail - self.capacity)
+            index, item = self._slots[head % self.capacity]
+            if index == head:
+                self._head = head + 1
+                return item
+            # Overwritten by a later item, possibly before the producer moved _tail: everything up to one lap
+            # before that item was overwritten too
+            head = index - self.capacity + 1
+
+    # --------------------------------------------------------------------------------
+    def get(self, block: bool = False, timeout: Optional[float] = None) -> Optional[Any]:
+        """The oldest item. With block=True, wait for one at most timeout seconds (forever if None)."""
+        item = self._pop()
+        if item is not None or not block:
+            return item
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            self._waiting += 1
+            try:
+                while (item := self._pop()) is None:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._not_empty.wait(remaining)
+                return item
+            finally:
+                self._waiting -= 1
+
+    # --------------------------------------------------------------------------------
+    def clear(self):
+        """Discard the unread items. Called by the consumer."""
+        self._head = self._tail
+
+    # --------------------------------------------------------------------------------
+    def stats(self) -> dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "size": len(self),
+            "written": self.written,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return min(self._tail - self._head, self.capacity)
@@ -0,0 +1,47 @@
+################################################################################
+import heapq
+import random
+import string
+from typing import Iterable, Iterator
+
+from device.input_log import TimedInput
+from device.keyboard import KeyEvent
+from device.mouse import MouseMotion
+
+# pg.key.name() of the keys that don't type their own name
+_KEY_NAMES = {" ": "space", "\n": "return", "\t": "tab"}
+
+# --------------------------------------------------------------------------------
+def synthetic_typing(rate: float, count: int, text: str = string.ascii_lowercase + " ",
+                     seed: int = 0) -> Iterator[TimedInput]:
+    """
+    count keystrokes at rate keys per second, drawn from text: a press and, half a period later, its release.
+    The same seed always gives the same keystrokes.
+    """
+    generator = random.Random(seed)
+    period = 1 / rate
+    for i in range(count):
+        char = generator.choice(text)
+        key = ord(char)
+        name = _KEY_NAMES.get(char, char)
+        yield i * period, "keyboard", KeyEvent(key, name, 0, True, 0., char)
+        yield (i + 0.5) * period, "keyboard", KeyEvent(key, name, 0, False, 0.)
+
+# --------------------------------------------------------------------------------
+def synthetic_mouse_motion(rate: float, count: int, size: tuple[int, int], step: int = 8,
+                           seed: int = 0) -> Iterator[TimedInput]:
+    """count motions at rate events per second: a random walk of at most step pixels per axis inside size."""
+    generator = random.Random(seed)
+    width, height = size
+    x, y = width // 2, height // 2
+    period = 1 / rate
+    for i in range(count):
+        new_x = min(max(x + generator.randint(-step, step), 0), width - 1)
+        new_y = min(max(y + generator.randint(-step, step), 0), height - 1)
+        yield i * period, "mouse", MouseMotion((new_x, new_y), (new_x - x, new_y - y), (False, False, False), 0.)
+        x, y = new_x, new_y
+
+# --------------------------------------------------------------------------------
+def merge_inputs(*streams: Iterable[TimedInput]) -> Iterator[TimedInput]:
+    """Interleave time-ordered input streams into a single time-ordered one."""
+    return heapq.merge(*streams, key=lambda timed_input: timed_input[0])
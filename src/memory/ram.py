@@ -0,0 +1,169 @@
+################################################################################
+import mmap
+import os
+import struct
+from os import PathLike
+from typing import Optional
+
+import numpy as np
+
+PAGE_SIZE = 4096
+
+# Words are little-endian
+DTYPES = {
+    "u8": np.dtype("u1"),
+    "u16": np.dtype("<u2"),
+    "u32": np.dtype("<u4"),
+    "u64": np.dtype("<u8"),
+}
+_WORDS = {name: struct.Struct("<" + code) for name, code in (("u8", "B"), ("u16", "H"), ("u32", "I"), ("u64", "Q"))}
+
+################################################################################
+class MemoryAccessError(IndexError):
+    """An access outside of the memory, or a write to read-only memory."""
+
+################################################################################
+class RAM:
+    """
+    Byte-addressable memory over a single contiguous mmap: anonymous, or backed by a file whose pages are only
+    loaded when they are accessed, so multi-GB images don't have to fit in memory.
+    - read(), view() and read_array() give zero-copy, read-only views of a range
+    - read_word() and write_word() access one u8, u16, u32 or u64 word
+    - write() and write_array() copy bytes or a NumPy array of words into memory
+    Every write marks the pages it touches as dirty, see dirty_pages() and dirty_ranges().
+    Views keep the mapping alive: they must be released before close().
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, size: Optional[int] = None, path: Optional[str | PathLike[str]] = None,
+                 page_size: int = PAGE_SIZE):
+        if path is None and not size:
+            raise ValueError("Anonymous RAM needs a size")
+
+        self.path = path
+        self.page_size = page_size
+        if path is None:
+            self._mmap = mmap.mmap(-1, size)
+        else:
+            with open(path, "a+b") as file:
+                file_size = os.fstat(file.fileno()).st_size
+                size = size or file_size
+                if not size:
+                    raise ValueError(f"{path} is empty, the RAM needs a size")
+                if file_size < size:
+                    # Sparse on most file systems: the new pages take no room until written
+                    file.truncate(size)
+                self._mmap = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_WRITE)
+        self.size = size
+        self._memory = memoryview(self._mmap)
+        self._dirty = np.zeros(-(-size // page_size), dtype=bool)
+
+    # --------------------------------------------------------------------------------
+    def _check(self, address: int, length: int):
+        if address < 0 or length < 0 or address + length > self.size:
+            raise MemoryAccessError(f"Access to [{address:#x}, {address + length:#x}) outside of the memory "
+                                    f"[0, {self.size:#x})")
+
+    # --------------------------------------------------------------------------------
+    def _mark_dirty(self, address: int, length: int):
+        if length:
+            self._dirty[address // self.page_size:(address + length - 1) // self.page_size + 1] = True
+
+    # --------------------------------------------------------------------------------
+    def view(self, address: int = 0, length: Optional[int] = None) -> memoryview:
+        """Read-only view of length bytes (up to the end if None) at address, without copying them."""
+        length = self.size - address if length is None else length
+        self._check(address, length)
+        return self._memory[address:address + length].toreadonly()
+
+    # --------------------------------------------------------------------------------
+    def read(self, address: int, length: int) -> memoryview:
+        return self.view(address, length)
+
+    # --------------------------------------------------------------------------------
+    def write(self, address: int, data: bytes | bytearray | memoryview):
+        data = memoryview(data).cast("B")
+        self._check(address, len(data))
+        self._memory[address:address + len(data)] = data
+        self._mark_dirty(address, len(data))
+
+    # --------------------------------------------------------------------------------
+    def read_word(self, address: int, dtype: str = "u32") -> int:
+        word = _WORDS[dtype]
+        self._check(address, word.size)
+        return word.unpack_from(self._mmap, address)[0]
+
+    # --------------------------------------------------------------------------------
+    def write_word(self, address: int, value: int, dtype: str = "u32"):
+        word = _WORDS[dtype]
+        self._check(address, word.size)
+        word.pack_into(self._mmap, address, value)
+        self._mark_dirty(address, word.size)
+
+    # --------------------------------------------------------------------------------
+    def read_array(self, address: int, count: int, dtype: str = "u8") -> np.ndarray:
+        """Read-only NumPy view of count words at address, without copying them."""
+        dtype = DTYPES[dtype]
+        self._check(address, count * dtype.itemsize)
+        array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=address)
+        array.flags.writeable = False
+        return array
+
+    # --------------------------------------------------------------------------------
+    def write_array(self, address: int, values: np.ndarray, dtype: str = "u8"):
+        """Write values as words at address, converting them to dtype if needed."""
+        dtype = DTYPES[dtype]
+        values = np.asarray(values).astype(dtype, copy=False).ravel()
+        self._check(address, values.nbytes)
+        np.frombuffer(self._mmap, dtype=dtype, count=len(values), offset=address)[:] = values
+        self._mark_dirty(address, values.nbytes)
+
+    # --------------------------------------------------------------------------------
+    def fill(self, value: int = 0, address: int = 0, length: Optional[int] = None):
+        """Set length bytes (up to the end if None) at address to value."""
+        length = self.size - address if length is None else length
+        self._check(address, length)
+        np.frombuffer(self._mmap, dtype=np.uint8, count=length, offset=address)[:] = value
+        self._mark_dirty(address, length)
+
+    # --------------------------------------------------------------------------------
+    def dirty_pages(self) -> np.ndarray:
+        """Indices of the pages written since the last clear_dirty()."""
+        return np.flatnonzero(self._dirty)
+
+    # --------------------------------------------------------------------------------
+    def dirty_ranges(self) -> list[tuple[int, int]]:
+        """(address, length) of every run of consecutive dirty pages."""
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], self._dirty, [False])).astype(np.int8)))
+        return [(int(start) * self.page_size, min(int(end) * self.page_size, self.size) - int(start) * self.page_size)
+                for start, end in zip(edges[::2], edges[1::2])]
+
+    # --------------------------------------------------------------------------------
+    def clear_dirty(self):
+        self._dirty[:] = False
+
+    # --------------------------------------------------------------------------------
+    def flush(self):
+        """Write the changes of a file-backed RAM to its file."""
+        if self.path is not None:
+            self._mmap.flush()
+
+    # --------------------------------------------------------------------------------
+    def close(self):
+        if self._mmap.closed:
+            return
+        self.flush()
+        self._memory.release()
+        self._mmap.close()
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return self.size
+
+    # --------------------------------------------------------------------------------
+    def __enter__(self) -> "RAM":
+        return self
+
+    # --------------------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,37 @@
+################################################################################
+import mmap
+import os
+from os import PathLike
+
+import numpy as np
+from memory.ram import PAGE_SIZE, RAM, MemoryAccessError
+
+################################################################################
+class ROM(RAM):
+    """
+    Read-only memory mapped from an image file, e.g. a boot ROM. Its pages are only loaded when they are read.
+    Reads are the same as the RAM's, writes raise MemoryAccessError.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, path: str | PathLike[str], page_size: int = PAGE_SIZE):
+        self.path = path
+        self.page_size = page_size
+        with open(path, "rb") as file:
+            self.size = os.fstat(file.fileno()).st_size
+            if not self.size:
+                raise ValueError(f"The ROM image {path} is empty")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._memory = memoryview(self._mmap)
+        # Never written
+        self._dirty = np.zeros(-(-self.size // page_size), dtype=bool)
+
+    # --------------------------------------------------------------------------------
+    def _read_only(self, *args, **kwargs):
+        raise MemoryAccessError("The ROM is read-only")
+
+    write = write_word = write_array = fill = _read_only
+
+    # --------------------------------------------------------------------------------
+    def flush(self):
+        pass
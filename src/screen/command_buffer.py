@@ -0,0 +1,153 @@
+################################################################################
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from util.compute_backend import Array, ComputeBackend, get_backend
+
+if TYPE_CHECKING:
+    from screen.screen import Screen
+
+################################################################################
+class CommandBuffer:
+    """
+    Records drawing commands to execute them later, grouped by primitive: each group is drawn in one vectorized
+    pass instead of one call per command, except filled rectangles, which are one slice assignment each.
+    Commands are therefore drawn primitive by primitive, in this order: filled rectangles, ellipses, circles,
+    lines and rectangle outlines, Bézier curves, pixels.
+    The recorded commands are kept as arrays on the compute backend, so a command buffer can be executed again
+    (e.g. a static part of a scene) without recording it again.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self):
+        self._pixels: list[tuple[int, ...]] = []  # x, y, r, g, b
+        self._lines: list[tuple[int, ...]] = []  # x1, y1, x2, y2, r, g, b
+        self._filled_rectangles: list[tuple[int, ...]] = []  # x, y, width, height, r, g, b
+        self._circles: list[tuple[int, ...]] = []  # cx, cy, radius, thickness, r, g, b
+        self._ellipses: list[tuple[int, ...]] = []  # cx, cy, rx, ry, thickness, r, g, b
+        self._quadratic_beziers: list[tuple[int, ...]] = []  # p0x, p0y, p1x, p1y, p2x, p2y, r, g, b
+        self._cubic_beziers: list[tuple[int, ...]] = []  # p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y, r, g, b
+        self._compiled: Optional[dict[str, Array]] = None
+        self._compiled_for: Optional[ComputeBackend] = None
+
+    # --------------------------------------------------------------------------------
+    @staticmethod
+    def _rgb(color) -> tuple[int, int, int]:
+        color = color.get() if hasattr(color, "get") else color
+        r, g, b = (int(c) for c in color)
+        return r, g, b
+
+    # --------------------------------------------------------------------------------
+    def _record(self, commands: list[tuple[int, ...]], *values: int) -> "CommandBuffer":
+        commands.append(tuple(int(value) for value in values))
+        self._compiled = None
+        return self
+
+    # --------------------------------------------------------------------------------
+    def pixel(self, x: int, y: int, color: Array) -> "CommandBuffer":
+        return self._record(self._pixels, x, y, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def line(self, x1: int, y1: int, x2: int, y2: int, color: Array) -> "CommandBuffer":
+        return self._record(self._lines, x1, y1, x2, y2, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def rectangle(self, x: int, y: int, width: int, height: int, color: Array,
+                  fill: bool = False) -> "CommandBuffer":
+        # Same bounds checking as Screen.draw_rectangle
+        if x < 0 or y < 0 or width <= 0 or height <= 0:
+            return self
+
+        if fill:
+            return self._record(self._filled_rectangles, x, y, width, height, *self._rgb(color))
+
+        # Outlines are drawn with the lines
+        right, bottom = x + width - 1, y + height - 1
+        rgb = self._rgb(color)
+        self._record(self._lines, x, y, right, y, *rgb)
+        self._record(self._lines, x, bottom, right, bottom, *rgb)
+        self._record(self._lines, x, y, x, bottom, *rgb)
+        return self._record(self._lines, right, y, right, bottom, *rgb)
+
+    # --------------------------------------------------------------------------------
+    def circle(self, cx: int, cy: int, radius: int, color: Array, thickness: int = 1) -> "CommandBuffer":
+        return self._record(self._circles, cx, cy, radius, thickness, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def ellipse(self, cx: int, cy: int, rx: int, ry: int, color: Array, thickness: int = 1) -> "CommandBuffer":
+        return self._record(self._ellipses, cx, cy, rx, ry, thickness, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def quadratic_bezier(self, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int,
+                         color: Array) -> "CommandBuffer":
+        return self._record(self._quadratic_beziers, p0x, p0y, p1x, p1y, p2x, p2y, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def cubic_bezier(self, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int, p3x: int, p3y: int,
+                     color: Array) -> "CommandBuffer":
+        return self._record(self._cubic_beziers, p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y, *self._rgb(color))
+
+    # --------------------------------------------------------------------------------
+    def compile(self, backend: Optional[str | ComputeBackend] = None) -> dict[str, Array]:
+        """Pack the recorded commands into one array per primitive, on a compute backend."""
+        backend = get_backend(backend)
+        if self._compiled is None or self._compiled_for is not backend:
+            groups = {
+                "pixels": self._pixels,
+                "lines": self._lines,
+                "filled_rectangles": self._filled_rectangles,
+                "circles": self._circles,
+                "ellipses": self._ellipses,
+                "quadratic_beziers": self._quadratic_beziers,
+                "cubic_beziers": self._cubic_beziers,
+            }
+            self._compiled = {name: backend.xp.asarray(np.array(commands, dtype=np.int64))
+                              for name, commands in groups.items() if commands}
+            self._compiled_for = backend
+        return self._compiled
+
+    # --------------------------------------------------------------------------------
+    def execute(self, screen: "Screen"):
+        """Draw the recorded commands on a screen, one vectorized pass per primitive but filled rectangles."""
+        compiled = self.compile(screen.backend)
+
+        if "filled_rectangles" in compiled:
+            # Each rectangle is a single slice assignment already
+            for x, y, width, height, *rgb in self._filled_rectangles:
+                screen.draw_rectangle(x, y, width, height, screen.xp.asarray(rgb), fill=True)
+
+        if "ellipses" in compiled:
+            ellipses = compiled["ellipses"]
+            screen.draw_ellipses(ellipses[:, :2], ellipses[:, 2:4], ellipses[:, 5:], ellipses[:, 4])
+
+        if "circles" in compiled:
+            circles = compiled["circles"]
+            screen.draw_ellipses(circles[:, :2], circles[:, [2, 2]], circles[:, 4:], circles[:, 3])
+
+        if "lines" in compiled:
+            lines = compiled["lines"]
+            screen.draw_lines(lines[:, :4], lines[:, 4:])
+
+        if "quadratic_beziers" in compiled:
+            curves = compiled["quadratic_beziers"]
+            screen.draw_quadratic_beziers(curves[:, :6], curves[:, 6:])
+
+        if "cubic_beziers" in compiled:
+            curves = compiled["cubic_beziers"]
+            screen.draw_cubic_beziers(curves[:, :8], curves[:, 8:])
+
+        if "pixels" in compiled:
+            pixels = compiled["pixels"]
+            screen.set_pixels(pixels[:, :2], pixels[:, 2:])
+
+    # --------------------------------------------------------------------------------
+    def clear(self):
+        for commands in (self._pixels, self._lines, self._filled_rectangles, self._circles, self._ellipses,
+                         self._quadratic_beziers, self._cubic_beziers):
+            commands.clear()
+        self._compiled = None
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return (len(self._pixels) + len(self._lines) + len(self._filled_rectangles) + len(self._circles)
+                + len(self._ellipses) + len(self._quadratic_beziers) + len(self._cubic_beziers))
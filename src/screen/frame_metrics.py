@@ -0,0 +1,165 @@
+################################################################################
+import csv
+import io
+import json
+import time
+from contextlib import contextmanager
+from os import PathLike
+from threading import Lock
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+################################################################################
+class FrameMetrics:
+    """
+    Per-frame timings of the refresh loop, kept in a fixed-size ring buffer.
+    Durations are recorded in seconds and reported in milliseconds. A phase that didn't happen during a frame
+    (e.g. nothing to present) is left empty for that frame.
+
+    Phases:
+    - events: handling the pygame events
+    - brightness: copying the frame to the surface through the brightness lookup table, when it isn't 1.0
+    - blit: copying the frame to the surface (when the brightness is 1.0) and to the window
+    - flip: updating the display
+    - latency: time between accept_frame() and the end of the presentation of that frame
+    - frame: time between the ends of two consecutive frames
+    """
+
+    PHASES = ("events", "brightness", "blit", "flip", "latency", "frame")
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._samples = np.full((capacity, len(self.PHASES)), np.nan)
+        self._current = np.full(len(self.PHASES), np.nan)
+        self._index = 0
+        self.count = 0
+        self._last_frame_end: Optional[float] = None
+        self._callbacks: dict[str, list[Callable[[float], None]]] = {phase: [] for phase in self.PHASES}
+        self._lock = Lock()
+
+    # --------------------------------------------------------------------------------
+    def record(self, phase: str, seconds: float):
+        """Add a duration to a phase of the current frame and notify the callbacks of that phase."""
+        column = self.PHASES.index(phase)
+        milliseconds = seconds * 1000
+        current = self._current[column]
+        self._current[column] = milliseconds if np.isnan(current) else current + milliseconds
+        for callback in self._callbacks[phase]:
+            callback(milliseconds)
+
+    # --------------------------------------------------------------------------------
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    # --------------------------------------------------------------------------------
+    def end_frame(self):
+        """Store the timings of the current frame and start a new one."""
+        now = time.perf_counter()
+        if self._last_frame_end is not None:
+            self.record("frame", now - self._last_frame_end)
+        self._last_frame_end = now
+
+        with self._lock:
+            self._samples[self._index] = self._current
+            self._index = (self._index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        self._current = np.full(len(self.PHASES), np.nan)
+
+    # --------------------------------------------------------------------------------
+    def add_callback(self, phase: str, callback: Callable[[float], None]):
+        """Call callback with the duration, in milliseconds, every time the phase is recorded."""
+        self._callbacks[phase].append(callback)
+
+    # --------------------------------------------------------------------------------
+    def remove_callback(self, phase: str, callback: Callable[[float], None]):
+        self._callbacks[phase].remove(callback)
+
+    # --------------------------------------------------------------------------------
+    def frames(self) -> np.ndarray:
+        """(count, phases) array of the stored frames, oldest first."""
+        with self._lock:
+            if self.count < self.capacity:
+                return self._samples[:self.count].copy()
+            return np.roll(self._samples, -self._index, axis=0)
+
+    # --------------------------------------------------------------------------------
+    def samples(self, phase: str) -> np.ndarray:
+        """Recorded durations of a phase in milliseconds, oldest first."""
+        values = self.frames()[:, self.PHASES.index(phase)]
+        return values[~np.isnan(values)]
+
+    # --------------------------------------------------------------------------------
+    def percentile(self, phase: str, q: float) -> Optional[float]:
+        values = self.samples(phase)
+        return float(np.percentile(values, q)) if len(values) else None
+
+    # --------------------------------------------------------------------------------
+    def fps(self) -> Optional[float]:
+        frame_times = self.samples("frame")
+        return float(1000 / frame_times.mean()) if len(frame_times) else None
+
+    # --------------------------------------------------------------------------------
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Mean, percentiles and maximum of every phase, in milliseconds."""
+        summary = {}
+        for phase in self.PHASES:
+            values = self.samples(phase)
+            if len(values):
+                summary[phase] = {
+                    "count": int(len(values)),
+                    "mean": float(values.mean()),
+                    "p50": float(np.percentile(values, 50)),
+                    "p90": float(np.percentile(values, 90)),
+                    "p99": float(np.percentile(values, 99)),
+                    "max": float(values.max()),
+                }
+        return summary
+
+    # --------------------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        frames = self.frames()
+        return {
+            "phases": list(self.PHASES),
+            "summary": self.summary(),
+            "fps": self.fps(),
+            "frames": [[None if np.isnan(value) else float(value) for value in frame] for frame in frames],
+        }
+
+    # --------------------------------------------------------------------------------
+    def to_json(self, path: Optional[str | PathLike[str]] = None) -> str:
+        content = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(content)
+        return content
+
+    # --------------------------------------------------------------------------------
+    def to_csv(self, path: Optional[str | PathLike[str]] = None) -> str:
+        """One row per frame, one column per phase, in milliseconds."""
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(self.PHASES)
+        for frame in self.frames():
+            writer.writerow(["" if np.isnan(value) else f"{value:.4f}" for value in frame])
+
+        content = output.getvalue()
+        if path is not None:
+            with open(path, "w", newline="") as file:
+                file.write(content)
+        return content
+
+    # --------------------------------------------------------------------------------
+    def clear(self):
+        with self._lock:
+            self._samples[:] = np.nan
+            self._index = 0
+            self.count = 0
+        self._current = np.full(len(self.PHASES), np.nan)
+        self._last_frame_end = None
@@ -0,0 +1,163 @@
+################################################################################
+import os
+import struct
+import time
+import zlib
+from os import PathLike
+from pathlib import Path
+from queue import Queue
+from threading import Lock, Thread
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+import pygame as pg
+from PIL import Image
+from screen.swap_chain import merge_dirty_rects
+from util.compute_backend import Array, ComputeBackend
+
+_MAGIC = b"VCFR"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBII")  # magic, version, width, height
+_FRAME_HEADER = struct.Struct("<IdH")  # frame index, seconds since the start, region count
+_REGION_HEADER = struct.Struct("<HHHHI")  # x, y, width, height, compressed size
+
+################################################################################
+class FrameRecorder:
+    """
+    Records the accepted frames of a screen from a background thread.
+    Only the regions that changed are copied on the rendering thread and handed over through a bounded queue;
+    the writer thread keeps its own copy of the frame, applies them and writes every frame as:
+    - "png": an image sequence, frame_000000.png, frame_000001.png, ... in the directory path
+    - "raw": a single stream of rgb24 frames, row by row, e.g. for
+      ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -i path out.mp4
+    - "zlib": a single stream of zlib compressed frames, read back with read_recording(). With delta=True only
+      the regions that changed since the previous frame are stored.
+    When the queue is full, the frame is skipped unless block is True: its regions are carried over to the next
+    recorded frame, so the recording stays consistent and the rendering thread never waits for the disk.
+    """
+
+    FORMATS = ("png", "raw", "zlib")
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, path: str | PathLike[str], size: tuple[int, int], backend: ComputeBackend,
+                 format: str = "png", delta: bool = True, queue_size: int = 8, block: bool = False,
+                 compression_level: int = 1):
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown recording format {format!r}, expected one of {self.FORMATS}")
+
+        self.path = Path(path)
+        self.width, self.height = size
+        self.format = format
+        self.delta = delta
+        self.block = block
+        self.compression_level = compression_level
+        self.backend = backend
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+
+        self._screen_rect = pg.Rect(0, 0, self.width, self.height)
+        # Regions not recorded yet: the first frame is recorded whole
+        self._carried: list[pg.Rect] = [self._screen_rect.copy()]
+        self._index = 0
+        self._start = time.perf_counter()
+        self._lock = Lock()
+        self._queue: Queue[Optional[tuple[int, float, list[tuple[pg.Rect, np.ndarray]]]]] = Queue(queue_size)
+        self._error: Optional[BaseException] = None
+
+        if format == "png":
+            os.makedirs(self.path, exist_ok=True)
+        self._file: Optional[BinaryIO] = None if format == "png" else open(self.path, "wb")
+        if format == "zlib":
+            self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, self.width, self.height))
+
+        self._writer = Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self._writer.start()
+
+    # --------------------------------------------------------------------------------
+    def capture(self, frame: Array, rects: list[pg.Rect]):
+        """Record a frame, given the regions that changed since the previous one. Called by the rendering thread."""
+        if self._error is not None:
+            raise RuntimeError("The frame recorder failed") from self._error
+
+        with self._lock:
+            rects = merge_dirty_rects(self._carried, rects)
+            if not self.delta:
+                rects = [self._screen_rect.copy()]
+            if self._queue.full() and not self.block:
+                # Skip this frame, its changes are recorded with the next one
+                self._carried = rects
+                self.frames_dropped += 1
+                self._index += 1
+                return
+            self._carried = []
+
+            # Copies of the changed regions only, in host memory
+            regions = [(rect, self.backend.asnumpy(frame[rect.left:rect.right, rect.top:rect.bottom]).copy())
+                       for rect in rects]
+            item = (self._index, time.perf_counter() - self._start, regions)
+            self._index += 1
+
+        self._queue.put(item)
+
+    # --------------------------------------------------------------------------------
+    def close(self):
+        """Write the queued frames and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --------------------------------------------------------------------------------
+    def _run(self):
+        canvas = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # Drain the queue so that producers never block on a dead writer
+
+            index, timestamp, regions = item
+            try:
+                for rect, pixels in regions:
+                    canvas[rect.left:rect.right, rect.top:rect.bottom] = pixels
+                self._write(index, timestamp, canvas, regions)
+                self.frames_recorded += 1
+            except BaseException as e:
+                self._error = e
+
+    # --------------------------------------------------------------------------------
+    def _write(self, index: int, timestamp: float, canvas: np.ndarray, regions: list[tuple[pg.Rect, np.ndarray]]):
+        if self.format == "png":
+            # Image rows are the y axis of the frame buffer
+            Image.fromarray(canvas.transpose(1, 0, 2)).save(self.path / f"frame_{index:06d}.png",
+                                                            compress_level=self.compression_level)
+        elif self.format == "raw":
+            self._file.write(np.ascontiguousarray(canvas.transpose(1, 0, 2)).tobytes())
+        else:
+            self._file.write(_FRAME_HEADER.pack(index, timestamp, len(regions)))
+            for rect, pixels in regions:
+                data = zlib.compress(pixels.tobytes(), self.compression_level)
+                self._file.write(_REGION_HEADER.pack(rect.x, rect.y, rect.width, rect.height, len(data)))
+                self._file.write(data)
+
+# --------------------------------------------------------------------------------
+def read_recording(path: str | PathLike[str]) -> Iterator[tuple[int, float, np.ndarray]]:
+    """
+    Frames of a "zlib" recording: frame index, seconds since the recording started and the (W, H, 3) frame.
+    The yielded array is updated in place by the next frame.
+    """
+    with open(path, "rb") as file:
+        magic, version, width, height = _FILE_HEADER.unpack(file.read(_FILE_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a frame recording")
+
+        frame = np.zeros((width, height, 3), dtype=np.uint8)
+        while header := file.read(_FRAME_HEADER.size):
+            index, timestamp, region_count = _FRAME_HEADER.unpack(header)
+            for _ in range(region_count):
+                x, y, region_width, region_height, size = _REGION_HEADER.unpack(file.read(_REGION_HEADER.size))
+                pixels = np.frombuffer(zlib.decompress(file.read(size)), dtype=np.uint8)
+                frame[x:x + region_width, y:y + region_height] = pixels.reshape(region_width, region_height, 3)
+            yield index, timestamp, frame
@@ -0,0 +1,183 @@
+################################################################################
+from typing import Optional
+
+import numpy as np
+import pygame as pg
+from util.compute_backend import Array, ComputeBackend
+
+TRANSFERS = ("direct", "staged")
+
+################################################################################
+class FrameTransfer:
+    """
+    Writes regions of a frame into a pygame surface.
+    Every region is blitted from its array with pg.surfarray.blit_array on a subsurface, which is several times
+    faster than writing through the strided pg.surfarray.pixels3d view, for whole frames as well as small regions.
+    The brightness lookup table, if any, is first applied into a preallocated contiguous staging buffer.
+    Usage: begin(), write() for every region, end().
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, surface: pg.Surface):
+        self.surface = surface
+        width, height = surface.get_size()
+        # Dirty regions don't overlap, so one frame worth of staging always fits them
+        self._staging = self._allocate_staging(width * height * 3)
+        # The lookup table applied to two bytes at once, built for the last table used
+        self._lut: Optional[np.ndarray] = None
+        self._pair_lut: Optional[np.ndarray] = None
+
+    # --------------------------------------------------------------------------------
+    def _allocate_staging(self, size: int) -> np.ndarray:
+        return np.empty(size, dtype=np.uint8)
+
+    # --------------------------------------------------------------------------------
+    def begin(self):
+        pass
+
+    # --------------------------------------------------------------------------------
+    def write(self, region: Array, rect: pg.Rect, lut: Optional[Array] = None):
+        if lut is not None:
+            staging = self._staging[:region.size].reshape(region.shape)
+            self._apply_lut(lut, region, staging)
+            region = staging
+        self._blit(region, rect)
+
+    # --------------------------------------------------------------------------------
+    def _apply_lut(self, lut: np.ndarray, region: np.ndarray, out: np.ndarray):
+        """
+        out = lut[region], gathering pairs of bytes through a 65536 entries table: half as many lookups, in a table
+        that still fits in cache.
+        """
+        width, height = region.shape[:2]
+        if height * 3 % 2:
+            np.take(lut, region, out=out)
+            return
+
+        if lut is not self._lut:
+            pairs = np.arange(1 << 16, dtype=np.uint16)
+            self._lut, self._pair_lut = lut, np.ascontiguousarray(lut[pairs.view(np.uint8)]).view(np.uint16)
+        # Every column of the region is contiguous, so it can be read as an even number of bytes
+        np.take(self._pair_lut, region.reshape(width, height * 3).view(np.uint16),
+                out=out.reshape(width, height * 3).view(np.uint16), mode="clip")
+
+    # --------------------------------------------------------------------------------
+    def _blit(self, pixels: np.ndarray, rect: pg.Rect):
+        pg.surfarray.blit_array(self.surface.subsurface(rect), pixels)
+
+    # --------------------------------------------------------------------------------
+    def end(self):
+        pass
+
+################################################################################
+class StagedFrameTransfer(FrameTransfer):
+    """
+    Transfer through the staging buffer: regions are first downloaded side by side into it, then blitted into the
+    surface once all the downloads are done, in end().
+    This base implementation stages in host memory; subclasses download from a device.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, surface: pg.Surface):
+        super().__init__(surface)
+        self._staged: list[tuple[pg.Rect, np.ndarray]] = []
+        self._offset = 0
+
+    # --------------------------------------------------------------------------------
+    def _download(self, region: Array, offset: int, staging: np.ndarray, lut: Optional[Array]):
+        if lut is None:
+            staging[...] = region
+        else:
+            self._apply_lut(lut, region, staging)
+
+    # --------------------------------------------------------------------------------
+    def _synchronize(self):
+        pass
+
+    # --------------------------------------------------------------------------------
+    def begin(self):
+        self._staged.clear()
+        self._offset = 0
+
+    # --------------------------------------------------------------------------------
+    def write(self, region: Array, rect: pg.Rect, lut: Optional[Array] = None):
+        # Contiguous slice of the staging buffer, so that downloads can be asynchronous
+        size = region.size
+        if self._offset + size > self._staging.size:
+            self._flush()
+        staging = self._staging[self._offset:self._offset + size].reshape(region.shape)
+        self._download(region, self._offset, staging, lut)
+        self._staged.append((rect, staging))
+        self._offset += size
+
+    # --------------------------------------------------------------------------------
+    def _flush(self):
+        self._synchronize()
+        for rect, staging in self._staged:
+            self._blit(staging, rect)
+        self._staged.clear()
+        self._offset = 0
+
+    # --------------------------------------------------------------------------------
+    def end(self):
+        self._flush()
+
+################################################################################
+class CupyFrameTransfer(StagedFrameTransfer):
+    """
+    Device to host transfer into pinned staging memory, on a dedicated CUDA stream: the downloads of all regions
+    are queued asynchronously and only waited for once, while producers keep drawing on the default stream.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, surface: pg.Surface, backend: ComputeBackend):
+        import cupyx
+
+        self._cupyx = cupyx
+        self.xp = backend.xp
+        self._stream = self.xp.cuda.Stream(non_blocking=True)
+        width, height = surface.get_size()
+        # Device side of the staging buffer: regions are made contiguous there before being downloaded
+        self._device_staging = self.xp.empty(width * height * 3, dtype=self.xp.uint8)
+        super().__init__(surface)
+
+    # --------------------------------------------------------------------------------
+    def _allocate_staging(self, size: int) -> np.ndarray:
+        return self._cupyx.empty_pinned((size,), dtype=np.uint8)
+
+    # --------------------------------------------------------------------------------
+    def begin(self):
+        super().begin()
+        # The frame was drawn on the current stream: downloads must not start before it is complete
+        self._stream.wait_event(self.xp.cuda.get_current_stream().record())
+
+    # --------------------------------------------------------------------------------
+    def _download(self, region: Array, offset: int, staging: np.ndarray, lut: Optional[Array]):
+        with self._stream:
+            contiguous = self._device_staging[offset:offset + region.size].reshape(region.shape)
+            if lut is None:
+                contiguous[...] = region
+            else:
+                # The lookup table is applied on the device
+                self.xp.take(lut, region, out=contiguous)
+            contiguous.get(stream=self._stream, out=staging, blocking=False)
+
+    # --------------------------------------------------------------------------------
+    def _synchronize(self):
+        self._stream.synchronize()
+
+# --------------------------------------------------------------------------------
+def create_frame_transfer(surface: pg.Surface, backend: ComputeBackend, kind: Optional[str] = None) -> FrameTransfer:
+    """
+    The transfer of the given kind, one of TRANSFERS, or the one suited to the compute backend if None.
+    "direct" blits regions as they are, "staged" goes through the staging buffer, a device one with CuPy.
+    """
+    if kind not in (None,) + TRANSFERS:
+        raise ValueError(f"Unknown frame transfer {kind!r}, expected one of {TRANSFERS}")
+    if backend.gpu:
+        if kind == "direct":
+            raise ValueError("Frames on a GPU can only be transferred staged")
+        return CupyFrameTransfer(surface, backend)
+    if kind == "staged":
+        return StagedFrameTransfer(surface)
+    return FrameTransfer(surface)
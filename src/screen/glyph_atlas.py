@@ -0,0 +1,162 @@
+################################################################################
+import string
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pygame as pg
+from util.compute_backend import Array, ComputeBackend, get_backend
+
+################################################################################
+class GlyphAtlas:
+    """
+    Alpha coverage of the glyphs of a font, rendered once and kept on the compute backend.
+    Glyphs are stored side by side as columns of a single (W, H) array, so a line of text is composed by
+    gathering the columns of its characters.
+    Glyphs are placed as pygame lays them out. Its pen moves in 1/64 px steps that depend on each pair of glyphs,
+    which the rounded font.metrics() lose: every step is measured once from the sizes of a few strings and cached.
+    A line whose measured width doesn't match font.size() (e.g. a ligature) is laid out from the sizes of all
+    its prefixes instead.
+    """
+
+    _PRELOADED = string.ascii_letters + string.digits + string.punctuation + " "
+    _LAYOUT_CACHE_SIZE = 1024
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, font: pg.font.Font, antialias: bool = True,
+                 backend: Optional[str | ComputeBackend] = None):
+        self.xp = get_backend(backend).xp
+        self.font = font
+        self.antialias = antialias
+        self.height = font.get_height()
+        self._host_columns: list[np.ndarray] = []
+        # char -> first column and width in the atlas, left and right of its bitmap and advance from font.metrics()
+        self._glyphs: dict[str, tuple[int, int, int, int, int]] = {}
+        # Pen position after the reference glyph of every char, and pen step of every pair, in 1/64 px
+        self._pens: dict[str, int] = {}
+        self._steps: dict[str, int] = {}
+        self._width = 0
+        # line -> (width, then columns in the line and columns in the atlas of the even and of the odd glyphs)
+        self._layouts: OrderedDict[str, tuple[int, Array, Array, Array, Array]] = OrderedDict()
+        self.atlas = self.xp.zeros((0, self.height), dtype=self.xp.uint8)
+        self.add(self._PRELOADED)
+
+        # font.size() only gives whole pixels: pens are measured after a reference glyph repeated k times, which
+        # starts them at any 1/64 px phase if its step is odd. _repetitions[phase] starts them phase / 64 px
+        # before the next pixel.
+        self._reference = None
+        for char in string.ascii_letters:
+            step = self.font.size(char * 65)[0] - self.font.size(char)[0]
+            if step % 2:
+                self._reference, self._reference_step = char, step
+                inverse = pow(step, -1, 64)
+                self._repetitions = [0] + [(64 - phase) * inverse % 64 + 1 for phase in range(1, 64)]
+                break
+
+    # --------------------------------------------------------------------------------
+    def add(self, chars: str):
+        """Render the glyphs that aren't in the atlas yet."""
+        missing = [char for char in dict.fromkeys(chars) if char not in self._glyphs]
+        if not missing:
+            return
+
+        for char in missing:
+            # White on black: the red channel is the coverage, whether the font is antialiased or not
+            surface = self.font.render(char, self.antialias, (255, 255, 255), (0, 0, 0))
+            coverage = pg.surfarray.array_red(surface)[:, :self.height].astype(np.uint8)
+            left, right, _, _, advance = self.font.metrics(char)[0] or (0, 0, 0, 0, 0)
+            self._glyphs[char] = (self._width, coverage.shape[0], left, right, advance)
+            self._host_columns.append(coverage)
+            self._width += coverage.shape[0]
+
+        self._host_columns = [np.concatenate(self._host_columns)]
+        self.atlas = self.xp.asarray(self._host_columns[0])
+
+    # --------------------------------------------------------------------------------
+    def compose(self, line: str) -> Array:
+        """Return the (W, H) coverage of a line of text."""
+        self.add(line)
+        if not line:
+            return self.atlas[:0]
+
+        width, even_targets, even_sources, odd_targets, odd_sources = self._layout(line)
+        coverage = self.xp.zeros((width, self.height), dtype=self.xp.uint8)
+        # Neighbouring glyphs may overlap: every other glyph is placed in a second pass, keeping the highest coverage
+        coverage[even_targets] = self.atlas[even_sources]
+        coverage[odd_targets] = self.xp.maximum(coverage[odd_targets], self.atlas[odd_sources])
+        return coverage
+
+    # --------------------------------------------------------------------------------
+    def _layout(self, line: str) -> tuple[int, Array, Array, Array, Array]:
+        layout = self._layouts.get(line)
+        if layout is not None:
+            self._layouts.move_to_end(line)
+            return layout
+
+        starts, widths, lefts, rights, advances = np.array([self._glyphs[char] for char in line]).T
+        width, firsts = self._place(line, widths, lefts, rights, advances[-1])
+        # Column of every glyph column in the line and in the atlas
+        glyph = np.repeat(np.arange(len(line)), widths)
+        column = np.arange(widths.sum()) - np.repeat(np.cumsum(widths) - widths, widths)
+        targets = firsts[glyph] + column
+        sources = starts[glyph] + column
+        inside = (targets >= 0) & (targets < width)
+        even = inside & (glyph % 2 == 0)
+        odd = inside & (glyph % 2 == 1)
+
+        layout = (width, self.xp.asarray(targets[even]), self.xp.asarray(sources[even]),
+                  self.xp.asarray(targets[odd]), self.xp.asarray(sources[odd]))
+        self._layouts[line] = layout
+        if len(self._layouts) > self._LAYOUT_CACHE_SIZE:
+            self._layouts.popitem(last=False)
+        return layout
+
+    # --------------------------------------------------------------------------------
+    def _place(self, line: str, widths: np.ndarray, lefts: np.ndarray, rights: np.ndarray,
+               last_advance: int) -> tuple[int, np.ndarray]:
+        """Width of a line and first column of every glyph in it."""
+        if self._reference is not None:
+            steps = self._steps
+            pens = np.cumsum([0] + [steps[pair] if pair in steps else self._step(pair)
+                                    for pair in map(str.__add__, line, line[1:])]) >> 6
+            left = min(0, int((pens + lefts).min()))
+            width = int(max((pens + rights).max(), pens[-1] + last_advance)) - left
+            if width == self.font.size(line)[0]:
+                # A glyph's columns start at its bitmap, or at the pen if the bitmap starts after it
+                return width, pens + np.minimum(lefts, 0) - left
+
+        # Each glyph ends where the text up to it ends
+        ends = np.array([self.font.size(line[:i + 1])[0] for i in range(len(line))])
+        return int(ends[-1]), ends - widths
+
+    # --------------------------------------------------------------------------------
+    def _step(self, pair: str) -> int:
+        """Pen step from the first glyph of a pair to the second one, in 1/64 px."""
+        first = pair[0]
+        if first not in self._pens:
+            self._pens[first] = self._measure_pen(first)
+        step = self._steps[pair] = self._measure_pen(pair) - self._pens[first]
+        return step
+
+    # --------------------------------------------------------------------------------
+    def _measure_pen(self, text: str) -> int:
+        """Pen position of the last glyph of text written after the reference glyph, in 1/64 px."""
+        left = min(0, self._glyphs[self._reference][2])
+        right, advance = self._glyphs[text[-1]][3:]
+
+        def pixels(repetitions: int) -> int:
+            # Whole pixels of the pen position, after the reference glyph repeated
+            size = self.font.size(self._reference * repetitions + text)[0]
+            return size - max(right, advance) + left - (repetitions - 1) * self._reference_step // 64
+
+        pixel = pixels(1)
+        # Binary search of the 1/64 px of the pen within its pixel: the largest that still reaches the next one
+        # from _repetitions[phase]
+        low, high = 0, 63
+        while low < high:
+            phase = (low + high + 1) // 2
+            if pixels(self._repetitions[phase]) > pixel:
+                low = phase
+            else:
+                high = phase - 1
+        return pixel * 64 + low
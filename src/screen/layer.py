@@ -0,0 +1,30 @@
+################################################################################
+from typing import Optional
+
+import pygame as pg
+from util.compute_backend import Array
+
+################################################################################
+class Layer:
+    """
+    A named image composited over the layers below it.
+    Pixels equal to colorkey are transparent (no colorkey: the layer is opaque), opacity (0 to 255) applies to the
+    whole layer. A layer keeps its content between frames: only the regions drawn since the last frame are
+    composited again.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, name: str, buffer: Array, opacity: int = 255, colorkey: Optional[Array] = None):
+        self.name = name
+        self.buffer = buffer
+        self.opacity = opacity
+        self.colorkey = colorkey
+        self.visible = True
+        # Regions drawn since the last composition
+        self.dirty_rects: list[pg.Rect] = []
+
+    # --------------------------------------------------------------------------------
+    @property
+    def opaque(self) -> bool:
+        """Whether the layer hides everything below it."""
+        return self.visible and self.colorkey is None and self.opacity >= 255
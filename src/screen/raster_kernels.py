@@ -0,0 +1,185 @@
+################################################################################
+import math
+from typing import Callable, Optional
+
+import numpy as np
+from util.compute_backend import ComputeBackend
+
+################################################################################
+# Scalar rasterizers, written as plain loops over host arrays so that a JIT (e.g. Numba) compiles them to native
+# code. They write straight into a (W, H, 3) frame buffer and draw the same pixels as the vectorized paths of Screen.
+
+# --------------------------------------------------------------------------------
+def _draw_lines(frame: np.ndarray, segments: np.ndarray, colors: np.ndarray):
+    """Bresenham's algorithm on an (N, 4) array of segments already clipped to the frame, (N, 3) colors."""
+    for i in range(segments.shape[0]):
+        x, y, x2, y2 = segments[i, 0], segments[i, 1], segments[i, 2], segments[i, 3]
+        dx = abs(x2 - x)
+        dy = abs(y2 - y)
+        sx = 1 if x2 > x else -1
+        sy = 1 if y2 > y else -1
+
+        if dx > dy:
+            err = dx // 2
+            while x != x2:
+                frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+                err -= dy
+                if err < 0:
+                    y += sy
+                    err += dx
+                x += sx
+        else:
+            err = dy // 2
+            while y != y2:
+                frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+                err -= dx
+                if err < 0:
+                    x += sx
+                    err += dy
+                y += sy
+        frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+
+# --------------------------------------------------------------------------------
+def _draw_sampled_arcs(frame: np.ndarray, centers: np.ndarray, radii: np.ndarray, rad_starts: np.ndarray,
+                       rad_ends: np.ndarray, colors: np.ndarray):
+    """Plot the points of each arc, one every 1 / (8 * radius) of its angle range."""
+    width, height = frame.shape[0], frame.shape[1]
+    for i in range(centers.shape[0]):
+        steps = max(8 * radii[i], 1)
+        delta_angle = (rad_ends[i] - rad_starts[i]) / steps
+        for step in range(steps + 1):
+            theta = rad_starts[i] + step * delta_angle
+            x = int(centers[i, 0] + radii[i] * math.cos(theta))
+            y = int(centers[i, 1] + radii[i] * math.sin(theta))
+            if 0 <= x < width and 0 <= y < height:
+                frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+
+# --------------------------------------------------------------------------------
+def _draw_masked_arcs(frame: np.ndarray, centers: np.ndarray, radii: np.ndarray, starts: np.ndarray,
+                      spans: np.ndarray, colors: np.ndarray, thickness: int, pie: bool):
+    """Same pixels as Screen._draw_masked_arcs: the circle mask of Screen._ellipse_mask, then the angle mask."""
+    width, height = frame.shape[0], frame.shape[1]
+    margin = max(thickness, 0) + 1
+    for i in range(centers.shape[0]):
+        cx, cy, r = centers[i, 0], centers[i, 1], radii[i]
+        if r <= 0:
+            continue
+        for x in range(max(cx - r - margin, 0), min(cx + r + margin + 1, width)):
+            for y in range(max(cy - r - margin, 0), min(cy + r + margin + 1, height)):
+                dx, dy = x - cx, y - cy
+                if thickness < 0:
+                    inside = (dx / r) ** 2 + (dy / r) ** 2 <= 1.0
+                else:
+                    distance = math.sqrt(dx ** 2 * r ** 2 + dy ** 2 * r ** 2) - (r * r)
+                    if thickness >= r:
+                        inside = distance <= 0
+                    else:
+                        distance_px = distance / max(math.sqrt(r ** 2 * (dy / r) ** 2 + r ** 2 * (dx / r) ** 2),
+                                                     1e-6)
+                        if thickness <= 1:
+                            inside = abs(distance_px) <= 0.5
+                        else:
+                            inside = -thickness / 2 < distance_px <= thickness / 2
+                if inside and spans[i] < 360:
+                    angle = math.degrees(math.atan2(dy, dx)) % 360
+                    inside = (angle - starts[i]) % 360 <= spans[i]
+                if pie and dx == 0 and dy == 0:
+                    inside = True
+                if inside:
+                    frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+
+# --------------------------------------------------------------------------------
+def _draw_ellipses(frame: np.ndarray, centers: np.ndarray, rx: np.ndarray, ry: np.ndarray, thickness: np.ndarray,
+                   colors: np.ndarray):
+    """Same pixels as Screen._ellipse_mask, ellipse by ellipse, over the bounding box of each one."""
+    width, height = frame.shape[0], frame.shape[1]
+    for i in range(centers.shape[0]):
+        cx, cy, a, b, t = centers[i, 0], centers[i, 1], rx[i], ry[i], thickness[i]
+        if a <= 0 or b <= 0:
+            continue
+        margin = max(t, 0) + 1
+        for x in range(max(cx - a - margin, 0), min(cx + a + margin + 1, width)):
+            for y in range(max(cy - b - margin, 0), min(cy + b + margin + 1, height)):
+                dx, dy = x - cx, y - cy
+                if t < 0:
+                    inside = (dx / a) ** 2 + (dy / b) ** 2 <= 1.0
+                else:
+                    distance = math.sqrt(dx ** 2 * b ** 2 + dy ** 2 * a ** 2) - (a * b)
+                    if t >= min(a, b):
+                        inside = distance <= 0
+                    else:
+                        distance_px = distance / max(math.sqrt(a ** 2 * (dy / b) ** 2 + b ** 2 * (dx / a) ** 2),
+                                                     1e-6)
+                        if t <= 1:
+                            inside = abs(distance_px) <= 0.5
+                        else:
+                            inside = -t / 2 < distance_px <= t / 2
+                if inside:
+                    frame[x, y, 0], frame[x, y, 1], frame[x, y, 2] = colors[i, 0], colors[i, 1], colors[i, 2]
+
+# --------------------------------------------------------------------------------
+def _flatten_beziers(control_points: np.ndarray, binomials: np.ndarray,
+                     max_samples: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Same sampling as Screen._flatten_beziers, curve by curve: returns the (M, 4) segments between consecutive
+    samples and the curve of each segment.
+    """
+    curve_count, order = control_points.shape[0], control_points.shape[1]
+    degree = order - 1
+
+    samples = np.empty(curve_count, dtype=np.int64)
+    for n in range(curve_count):
+        length = 0.0
+        for k in range(degree):
+            length += math.sqrt((control_points[n, k + 1, 0] - control_points[n, k, 0]) ** 2
+                                + (control_points[n, k + 1, 1] - control_points[n, k, 1]) ** 2)
+        samples[n] = min(int(math.ceil(length)) + 2, max_samples)
+
+    segments = np.empty((samples.sum(), 4), dtype=np.int64)
+    curve_index = np.empty(samples.sum(), dtype=np.int64)
+    count = 0
+    for n in range(curve_count):
+        previous_x, previous_y = 0, 0
+        for step in range(samples[n]):
+            t = step / (samples[n] - 1)
+            x, y = 0.0, 0.0
+            for k in range(order):
+                basis = binomials[k] * t ** k * (1 - t) ** (degree - k)
+                x += basis * control_points[n, k, 0]
+                y += basis * control_points[n, k, 1]
+            xi, yi = int(x), int(y)
+
+            # The first point is linked to itself, which also draws curves that collapse onto a single pixel
+            if step == 0:
+                previous_x, previous_y = xi, yi
+            elif xi == previous_x and yi == previous_y:
+                continue
+            segments[count, 0], segments[count, 1], segments[count, 2], segments[count, 3] = \
+                previous_x, previous_y, xi, yi
+            curve_index[count] = n
+            previous_x, previous_y = xi, yi
+            count += 1
+    return segments[:count], curve_index[:count]
+
+################################################################################
+class RasterKernels:
+    """The scalar rasterizers, compiled by the JIT of a compute backend."""
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, jit: Callable):
+        self.draw_lines = jit(_draw_lines)
+        self.draw_sampled_arcs = jit(_draw_sampled_arcs)
+        self.draw_masked_arcs = jit(_draw_masked_arcs)
+        self.draw_ellipses = jit(_draw_ellipses)
+        self.flatten_beziers = jit(_flatten_beziers)
+
+_kernels: dict[str, RasterKernels] = {}
+
+# --------------------------------------------------------------------------------
+def get_raster_kernels(backend: ComputeBackend) -> Optional[RasterKernels]:
+    """The compiled kernels of a backend, or None if it has no JIT (the vectorized paths are used instead)."""
+    if backend.jit is None:
+        return None
+    if backend.name not in _kernels:
+        _kernels[backend.name] = RasterKernels(backend.jit)
+    return _kernels[backend.name]
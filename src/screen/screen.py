@@ -1,14 +1,29 @@
 ################################################################################
 import math
+import time
+from contextlib import contextmanager, nullcontext
 from fractions import Fraction
 from os import PathLike
-from threading import Lock
-from typing import Optional
+from threading import Lock, local
+from typing import Hashable, Iterator, Optional, Sequence
 from pygame.time import Clock
+import numpy as np
 import pygame as pg
 from device.input_device import InputDevice
-from device.keyboard import Keyboard
-from util.compute_backend import xp
+from device.input_log import InputRecorder
+from device.keyboard import KeyEvent, Keyboard
+from device.mouse import Mouse, MouseButton, MouseMotion, MouseWheel
+from screen.command_buffer import CommandBuffer
+from screen.frame_metrics import FrameMetrics
+from screen.frame_recorder import FrameRecorder
+from screen.frame_transfer import create_frame_transfer
+from screen.glyph_atlas import GlyphAtlas
+from screen.layer import Layer
+from screen.raster_kernels import get_raster_kernels
+from screen.swap_chain import SwapChain, add_dirty_rect, merge_dirty_rects
+from screen.text_cache import TextCache
+from screen.texture_store import Texture, TextureStore, surface_to_arrays
+from util.compute_backend import Array, ComputeBackend, get_backend
 from pygame import Surface
 
 ################################################################################
@@ -34,96 +49,384 @@ class Screen:
     _BOTTOM = 4  # 0100
     _TOP = 8  # 1000
 
+    # Past this many disjoint dirty regions, uploading their union is cheaper
+    _MAX_DIRTY_RECTS = 32
+
+    # Up to this many segments, e.g. a rectangle outline, draw_lines() draws them one by one
+    _FEW_SEGMENTS = 4
+
+    # On the CPU, ellipses whose bounding boxes average more pixels than this are drawn box by box, smaller ones in
+    # one flat batch of pixels
+    _SMALL_ELLIPSE_AREA = 300
+
+    # Bottom layer, created with the first layer: it receives the drawing done outside of layer()
+    BASE_LAYER = "base"
+
     # --------------------------------------------------------------------------------
-    def __init__(self, height, width, hz: int = 60, brightness: float = 1.0):
+    def __init__(self, height, width, hz: int = 60, brightness: float = 1.0,
+                 text_cache_bytes: int = 64 * 1024 * 1024,
+                 headless: bool = False,
+                 buffer_count: int = 3,
+                 backend: Optional[str | ComputeBackend] = None,
+                 transfer: Optional[str] = None):
+        """
+        A headless screen never opens a window: the frame buffer is presented to an offscreen surface only,
+        so it runs without any display. hz=0 runs the refresh loop unthrottled.
+        buffer_count is the number of frame buffers: 2 for double buffering, 3 for triple buffering.
+        backend is the compute backend of the frame buffers, see util.compute_backend.get_backend(). Screens with
+        different backends can run side by side.
+        transfer is how presented regions reach the surface, "direct" or "staged" (see create_frame_transfer()),
+        the one suited to the backend if None.
+        """
         self.resolution: Resolution = Resolution(width, height)
-        self.frame_buffer = xp.zeros((width, height, 3), dtype=xp.uint8)
-        _h, _w = self.frame_buffer.shape[:2]
-        self._x_grid, self._y_grid = xp.indices((_h, _w))
+        self.backend = get_backend(backend)
+        self.xp = self.backend.xp
+        # Compiled scalar rasterizers, when the backend has a JIT
+        self._kernels = get_raster_kernels(self.backend)
+        # Producers draw into the back buffer of the swap chain, the refresh loop presents the accepted frames
+        self._swap_chain = SwapChain((width, height, 3), buffer_count, self.backend)
+        self._back_buffer = self._swap_chain.back
+        # Layers from bottom to top, see add_layer(). Without layers, drawing goes straight to the back buffer.
+        self.layers: dict[str, Layer] = {}
+        # Per thread state: the layer drawn into
+        self._local = local()
         self.is_on = False
         self.refresh_rate = hz
-        pg.init()
+        self.headless = headless
+        if headless:
+            pg.font.init()
+        else:
+            pg.init()
         self.screen: Optional[Surface] = None
         self.surface = pg.Surface((self.resolution.width, self.resolution.height))
         self.clock: Clock = pg.time.Clock()
         self.brightness: float = brightness
-        self.bright_frame = None
-        self._dirty = False
-        self.cached_texts: dict[tuple[str, bool, tuple, tuple, pg.font.Font], pg.Surface] = {}
+        self._brightness_lut = self._build_brightness_lut(brightness)
+        self._transfer = create_frame_transfer(self.surface, self.backend, transfer)
+        self._screen_rect = pg.Rect(0, 0, self.resolution.width, self.resolution.height)
+        self._dirty_rects: list[pg.Rect] = []
+        self._pending_batches: list[tuple[CommandBuffer, Optional[str]]] = []
+        self.metrics = FrameMetrics()
+        self.recorder: Optional[FrameRecorder] = None
+        self.input_recorder: Optional[InputRecorder] = None
+        self.cached_texts = TextCache(text_cache_bytes)
+        self.textures = TextureStore(self.backend)
+        self.glyph_atlases: dict[tuple[pg.font.Font, bool], GlyphAtlas] = {}
+        self._default_font: Optional[pg.font.Font] = None
         self._dirty_lock = Lock()
         self.input_devices: dict[str, InputDevice] = {
-            "keyboard": Keyboard()
+            "keyboard": Keyboard(),
+            "mouse": Mouse(),
         }
 
     # --------------------------------------------------------------------------------
-    def power_on(self):
-        self.screen = pg.display.set_mode((self.resolution.width, self.resolution.height),
-                                          pg.DOUBLEBUF | pg.HWSURFACE,
-                                          vsync=1)
-        pg.display.set_caption("Virtual screen")
+    def power_on(self, blocking: bool = True):
+        """
+        Turn the screen on and run its refresh loop until it is turned off.
+        With blocking=False, the screen is only turned on and frames are presented by calling step().
+        """
+        if not self.headless:
+            self.screen = pg.display.set_mode((self.resolution.width, self.resolution.height),
+                                              pg.DOUBLEBUF | pg.HWSURFACE,
+                                              vsync=1)
+            pg.display.set_caption("Virtual screen")
+        # Producers wait for a free buffer only while frames are being presented
+        self._swap_chain.set_blocking(blocking)
         self.is_on = True
+        self._mark_dirty(0, 0, self.resolution.width, self.resolution.height)
+        self.accept_frame()
         self.update()
 
-        self._run_event_loop()
+        if blocking:
+            self._run_event_loop()
+
+    # --------------------------------------------------------------------------------
+    def step(self):
+        """Handle pending events and present the accepted frame, without waiting for the refresh rate."""
+        self.handle_events()
+        if self.is_on:
+            self.update()
 
     # --------------------------------------------------------------------------------
     def _run_event_loop(self):
-        while self.is_on:
-            self.handle_events()
+        try:
+            while self.is_on:
+                self.handle_events()
 
-            # The screen my have been turned off
-            if not self.is_on:
-                break
+                # The screen my have been turned off
+                if not self.is_on:
+                    break
 
-            self.update()
-            self.clock.tick(self.refresh_rate)
+                self.update()
+                self.clock.tick(self.refresh_rate)
+        finally:
+            self._swap_chain.set_blocking(False)
 
     # --------------------------------------------------------------------------------
     def handle_events(self):
-        for event in pg.event.get():
+        if self.headless:
+            return
+
+        with self.metrics.measure("events"):
+            events = pg.event.get()
+        exposed = False
+        for event in events:
             if event.type == pg.QUIT:
                 self.power_off()
 
-            if event.type == pg.KEYDOWN:
-                self.input_devices["keyboard"].write(pg.key.name(event.key))
+            if event.type in (pg.KEYDOWN, pg.KEYUP):
+                self.input_devices["keyboard"].write(KeyEvent.from_pygame(event))
+            elif event.type == pg.MOUSEMOTION:
+                self.input_devices["mouse"].write(MouseMotion.from_pygame(event))
+            elif event.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP):
+                self.input_devices["mouse"].write(MouseButton.from_pygame(event))
+            elif event.type == pg.MOUSEWHEEL:
+                self.input_devices["mouse"].write(MouseWheel.from_pygame(event))
+            elif event.type in (pg.WINDOWEXPOSED, pg.VIDEOEXPOSE):
+                exposed = True
+        for device in self.input_devices.values():
+            device.flush()
+
+        # Only changed regions are presented: a window that was uncovered or restored is repainted whole from the
+        # surface, which holds the last presented frame
+        if exposed and self.is_on:
+            self.screen.blit(self.surface, (0, 0))
+            pg.display.flip()
 
     # --------------------------------------------------------------------------------
     def power_off(self):
         self.is_on = False
-        pg.quit()
+        if not self.headless:
+            pg.quit()
         self.cached_texts.clear()
+        self.glyph_atlases.clear()
+        self.stop_recording()
+        self.stop_input_recording()
 
     # --------------------------------------------------------------------------------
     def update(self):
         if self.is_on:
-            if self._dirty:
-                if self.brightness != 1.0:
-                    self.bright_frame = xp.clip(self.frame_buffer.astype(xp.float16) * self.brightness, 0,
-                                                255).astype(xp.uint8)
+            frame = self._swap_chain.acquire()
+            if frame is not None:
+                buffer, rects, accepted_at = frame
+                start = time.perf_counter()
+
+                # Only the regions that changed in this frame are pushed, straight into the surface pixels.
+                # The brightness lookup table is applied during that copy.
+                lut = self._brightness_lut if self.brightness != 1.0 else None
+                self._transfer.begin()
+                for rect in rects:
+                    self._transfer.write(buffer[rect.left:rect.right, rect.top:rect.bottom], rect, lut)
+                self._transfer.end()
+                self._swap_chain.release()
+                transfer_time = time.perf_counter() - start
+
+                if not self.headless:
+                    for rect in rects:
+                        self.screen.blit(self.surface, rect, rect)
+                if lut is None:
+                    self.metrics.record("blit", time.perf_counter() - start)
                 else:
-                    self.bright_frame = self.frame_buffer.copy()
-                pg.surfarray.blit_array(self.surface,
-                                        xp.asnumpy(self.bright_frame) if xp.__name__ != "numpy" else self.bright_frame)
-                with self._dirty_lock:
-                    self._dirty = False
-            self.screen.blit(self.surface, (0, 0))
-            pg.display.flip()
+                    self.metrics.record("brightness", transfer_time)
+                    self.metrics.record("blit", time.perf_counter() - start - transfer_time)
 
-            if pg.time.get_ticks() % 1000 < 16:  # ~once per second
-                print(f"FPS: {self.clock.get_fps():.1f}")
+                if not self.headless:
+                    with self.metrics.measure("flip"):
+                        pg.display.update(rects)
+                self.metrics.record("latency", time.perf_counter() - accepted_at)
+
+            self.metrics.end_frame()
 
     # --------------------------------------------------------------------------------
     def set_backlight(self, brightness: float):
+        self._brightness_lut = self._build_brightness_lut(brightness)
         self.brightness = brightness
+        # Every pixel changes: the latest accepted frame is presented again whole with the new table. Accepting a
+        # frame instead would present the back buffer, which may be half drawn.
+        self._swap_chain.represent([self._screen_rect.copy()])
+
+    # --------------------------------------------------------------------------------
+    def _build_brightness_lut(self, brightness: float) -> Array:
+        """Map every possible channel value to its value at the given brightness."""
+        return self.xp.clip(self.xp.arange(256, dtype=self.xp.float32) * brightness, 0, 255).astype(self.xp.uint8)
 
     # --------------------------------------------------------------------------------
-    def set_pixel(self, x: int, y: int, color: xp.ndarray) -> "Screen":
+    def _mark_dirty(self, x: int, y: int, width: int, height: int):
+        """Record the region touched by a drawing operation, merging it with the overlapping ones."""
+        rect = pg.Rect(x, y, width, height).clip(self._screen_rect)
+        if not rect.width or not rect.height:
+            return
+
+        with self._dirty_lock:
+            layer = self._current_layer()
+            if layer is None:
+                self._dirty_rects = add_dirty_rect(self._dirty_rects, rect, self._MAX_DIRTY_RECTS)
+            else:
+                layer.dirty_rects = add_dirty_rect(layer.dirty_rects, rect, self._MAX_DIRTY_RECTS)
+
+    # --------------------------------------------------------------------------------
+    @property
+    def frame_buffer(self) -> Array:
+        """The buffer drawing operations write into: the current layer's, or the back buffer without layers."""
+        layer = self._current_layer()
+        return self._back_buffer if layer is None else layer.buffer
+
+    # --------------------------------------------------------------------------------
+    def _current_layer(self) -> Optional[Layer]:
+        if not self.layers:
+            return None
+        return self.layers.get(getattr(self._local, "layer", None)) or self.layers[self.BASE_LAYER]
+
+    # --------------------------------------------------------------------------------
+    def add_layer(self, name: str, opacity: int = 255, colorkey: Optional[Array] = (0, 0, 0)) -> Layer:
+        """
+        Add a layer on top of the others. Pixels of the colorkey color are transparent (black by default, so that
+        clear() empties the layer), colorkey=None makes an opaque layer. opacity (0 to 255) applies to the whole layer.
+        Adding the first layer turns the frame drawn so far into the bottom layer, named BASE_LAYER.
+        """
+        with self._dirty_lock:
+            if name in self.layers or name == self.BASE_LAYER:
+                raise ValueError(f"A layer named {name!r} already exists")
+            if not self.layers:
+                self.layers[self.BASE_LAYER] = Layer(self.BASE_LAYER, self._back_buffer.copy())
+
+            layer = Layer(name, self.xp.zeros_like(self._back_buffer), opacity,
+                          self.xp.asarray(colorkey, dtype=self.xp.uint8) if colorkey is not None else None)
+            layer.dirty_rects = [self._screen_rect.copy()]
+            self.layers[name] = layer
+        return layer
+
+    # --------------------------------------------------------------------------------
+    def remove_layer(self, name: str):
+        """Remove a layer other than the base layer: what it covered is composited again."""
+        if name == self.BASE_LAYER:
+            raise ValueError("The base layer can't be removed")
+        with self._dirty_lock:
+            del self.layers[name]
+            base = self.layers[self.BASE_LAYER]
+            base.dirty_rects = [self._screen_rect.copy()]
+
+    # --------------------------------------------------------------------------------
+    def set_layer_opacity(self, name: str, opacity: int):
+        with self._dirty_lock:
+            layer = self.layers[name]
+            layer.opacity = opacity
+            layer.dirty_rects = [self._screen_rect.copy()]
+
+    # --------------------------------------------------------------------------------
+    def set_layer_visible(self, name: str, visible: bool):
+        with self._dirty_lock:
+            layer = self.layers[name]
+            layer.visible = visible
+            layer.dirty_rects = [self._screen_rect.copy()]
+
+    # --------------------------------------------------------------------------------
+    @contextmanager
+    def layer(self, name: str) -> Iterator[Layer]:
+        """
+        Draw into a layer: the drawing operations of this thread inside the with block go to that layer.
+        Only the regions drawn into are composited again when the frame is accepted.
+        """
+        layer = self.layers[name]
+        previous = getattr(self._local, "layer", None)
+        self._local.layer = name
+        try:
+            yield layer
+        finally:
+            self._local.layer = previous
+
+    # --------------------------------------------------------------------------------
+    def _compose(self, rect: pg.Rect):
+        """Composite the layers into a region of the back buffer, from the topmost opaque one up."""
+        region = (slice(rect.left, rect.right), slice(rect.top, rect.bottom))
+        target = self._back_buffer[region]
+        layers = list(self.layers.values())
+        bottom = max((i for i, layer in enumerate(layers) if layer.opaque), default=None)
+        if bottom is None:
+            target[...] = 0
+            bottom = -1
+        else:
+            target[...] = layers[bottom].buffer[region]
+
+        for layer in layers[bottom + 1:]:
+            if not layer.visible or layer.opacity <= 0:
+                continue
+            source = layer.buffer[region]
+            if layer.colorkey is None:
+                coverage = self.xp.full(source.shape[:2], layer.opacity, dtype=self.xp.uint8)
+            else:
+                coverage = self.xp.where((source == layer.colorkey).all(axis=2), 0, layer.opacity)
+            self._blend(target, source, coverage)
+
+    # --------------------------------------------------------------------------------
+    def set_pixel(self, x: int, y: int, color: Array) -> "Screen":
         self.frame_buffer[x, y] = color
+        self._mark_dirty(x, y, 1, 1)
         return self
 
     # --------------------------------------------------------------------------------
-    def fill(self, color: xp.ndarray) -> "Screen":
+    def set_pixels(self, points: Array, colors: Array) -> "Screen":
+        """Set an (N, 2) array of pixels at once, to a single color or to an (N, 3) array of colors"""
+        points = self.xp.asarray(points, dtype=self.xp.int64).reshape(-1, 2)
+        colors = self.xp.asarray(colors)
+        visible = ((points >= 0) & (points < self.xp.asarray([self.resolution.width, self.resolution.height]))).all(axis=1)
+        points = points[visible]
+        if not len(points):
+            return self
+
+        self.frame_buffer[points[:, 0], points[:, 1]] = colors[visible] if colors.ndim == 2 else colors
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0).tolist(), points.max(axis=0).tolist()
+        self._mark_dirty(x_min, y_min, x_max - x_min + 1, y_max - y_min + 1)
+        return self
+
+    # --------------------------------------------------------------------------------
+    def fill(self, color: Array) -> "Screen":
         self.frame_buffer[:, :] = color
+        self._mark_dirty(0, 0, self.resolution.width, self.resolution.height)
+        return self
+
+    # --------------------------------------------------------------------------------
+    def copy_region(self, src_rect: pg.Rect | tuple[int, int, int, int], dst_xy: tuple[int, int]) -> "Screen":
+        """
+        Copy a region of the frame so that its top left corner lands on dst_xy. The regions may overlap.
+        Only the pixels that are on the screen both before and after the move are copied.
+        """
+        src_rect = pg.Rect(src_rect)
+        offset_x, offset_y = dst_xy[0] - src_rect.x, dst_xy[1] - src_rect.y
+        source = src_rect.clip(self._screen_rect).clip(self._screen_rect.move(-offset_x, -offset_y))
+        if not source.width or not source.height:
+            return self
+
+        destination = source.move(offset_x, offset_y)
+        region = self.frame_buffer[source.left:source.right, source.top:source.bottom]
+        if self.backend.gpu and destination.colliderect(source):
+            # NumPy copies overlapping slices safely (a single memmove when they are contiguous), CuPy doesn't
+            region = region.copy()
+        self.frame_buffer[destination.left:destination.right, destination.top:destination.bottom] = region
+
+        self._mark_dirty(*destination)
+        return self
+
+    # --------------------------------------------------------------------------------
+    def scroll(self, dx: int, dy: int, fill_color: Optional[Array] = None) -> "Screen":
+        """
+        Move the whole frame by (dx, dy) pixels, e.g. scroll(0, -line_height) scrolls a console up by a line.
+        The uncovered band is filled with fill_color, black by default.
+        """
+        width, height = self.resolution.width, self.resolution.height
+        self.copy_region(self._screen_rect, (dx, dy))
+
+        fill_color = fill_color if fill_color is not None else 0
+        if dx > 0:
+            self.frame_buffer[:dx] = fill_color
+        elif dx < 0:
+            self.frame_buffer[max(width + dx, 0):] = fill_color
+        if dy > 0:
+            self.frame_buffer[:, :dy] = fill_color
+        elif dy < 0:
+            self.frame_buffer[:, max(height + dy, 0):] = fill_color
+
+        self._mark_dirty(0, 0, width, height)
         return self
 
     # --------------------------------------------------------------------------------
@@ -131,45 +434,125 @@ class Screen:
         self.refresh_rate = hz
 
     # --------------------------------------------------------------------------------
-    def draw_line(self, x1: int, y1: int, x2: int, y2: int, color: xp.ndarray) -> "Screen":
-        """Draw a line pixel by pixel using Bresenham's line algorithm"""
-        clipped = self._cohen_sutherland_clip(x1, y1, x2, y2, self.resolution.width, self.resolution.height)
-        if clipped is None:
-            return self  # Line completely outside
+    def draw_line(self, x1: int, y1: int, x2: int, y2: int, color: Array) -> "Screen":
+        """Draw a line using Bresenham's line algorithm"""
+        clipped = self._clip_segment(int(x1), int(y1), int(x2), int(y2))
+        if clipped is not None:
+            self._draw_segment(*clipped, color)
+        return self
 
-        x1, y1, x2, y2 = clipped
-        dx = abs(x2 - x1)
-        dy = abs(y2 - y1)
-        x, y = x1, y1
+    # --------------------------------------------------------------------------------
+    def draw_polyline(self, points: Array, color: Array, closed: bool = False) -> "Screen":
+        """Draw connected lines through an (N, 2) array of points"""
+        points = self.xp.asarray(points, dtype=self.xp.int64).reshape(-1, 2)
+        if closed:
+            points = self.xp.concatenate((points, points[:1]))
+        if len(points) < 2:
+            return self.draw_lines(self.xp.concatenate((points, points), axis=1), color)
 
-        sx = 1 if x2 > x1 else -1
-        sy = 1 if y2 > y1 else -1
+        return self.draw_lines(self.xp.concatenate((points[:-1], points[1:]), axis=1), color)
 
-        if dx > dy:
-            err = dx // 2
-            while x != x2:
-                self.set_pixel(x, y, color)
-                err -= dy
-                if err < 0:
-                    y += sy
-                    err += dx
-                x += sx
+    # --------------------------------------------------------------------------------
+    def draw_lines(self, segments: Array, colors: Array) -> "Screen":
+        """
+        Draw an (N, 4) array of x1, y1, x2, y2 segments in one pass.
+        Every pixel of every segment is computed at once with the same integer arithmetic as Bresenham's
+        algorithm, then written with a single scatter. On a backend with a JIT, a compiled Bresenham loop draws
+        them instead. A few segments, e.g. a single line, are clipped and drawn one by one, which costs less.
+        colors is either one color for all the segments or an (N, 3) array with one color per segment.
+        """
+        segments = self.xp.asarray(segments, dtype=self.xp.int64).reshape(-1, 4)
+        colors = self.xp.asarray(colors)
+        per_segment_colors = colors.ndim == 2
+
+        if len(segments) <= self._FEW_SEGMENTS:
+            # Clipping and enumerating the pixels of all the segments at once only pays off for many of them
+            for index, segment in enumerate(self.backend.asnumpy(segments).tolist()):
+                clipped = self._clip_segment(*segment)
+                if clipped is not None:
+                    self._draw_segment(*clipped, colors[index] if per_segment_colors else colors)
+            return self
+
+        segments, visible = self._cohen_sutherland_clip(segments, self.resolution.width, self.resolution.height)
+        if not bool(visible.all()):
+            segments = segments[visible]
+            if per_segment_colors:
+                colors = colors[visible]
+        if not len(segments):
+            return self  # Lines completely outside
+
+        x1, y1, x2, y2 = segments.T
+        if self._kernels is not None:
+            self._kernels.draw_lines(self.frame_buffer, segments, self._per_item_colors(colors, len(segments)))
         else:
-            err = dy // 2
-            while y != y2:
-                self.set_pixel(x, y, color)
-                err -= dx
-                if err < 0:
-                    x += sx
-                    err += dy
-                y += sy
+            self._draw_lines_vectorized(x1, y1, x2, y2, colors, per_segment_colors)
 
-        self.set_pixel(x, y, color)  # Draw final point
+        x_min, y_min = int(self.xp.minimum(x1, x2).min()), int(self.xp.minimum(y1, y2).min())
+        x_max, y_max = int(self.xp.maximum(x1, x2).max()), int(self.xp.maximum(y1, y2).max())
+        self._mark_dirty(x_min, y_min, x_max - x_min + 1, y_max - y_min + 1)
 
         return self
 
     # --------------------------------------------------------------------------------
-    def draw_rectangle(self, x: int, y: int, width: int, height: int, color: xp.ndarray,
+    def _draw_segment(self, x1: int, y1: int, x2: int, y2: int, color: Array):
+        """Draw a segment that is inside the screen, with the arithmetic of _draw_lines_vectorized."""
+        dx, dy = abs(x2 - x1), abs(y2 - y1)
+        if dx > dy:
+            self.frame_buffer[self._bresenham_run(x1, x2), self._bresenham_run(y1, y2, dx, dy)] = color
+        else:
+            self.frame_buffer[self._bresenham_run(x1, x2, dy, dx), self._bresenham_run(y1, y2)] = color
+        self._mark_dirty(min(x1, x2), min(y1, y2), dx + 1, dy + 1)
+
+    # --------------------------------------------------------------------------------
+    def _bresenham_run(self, start: int, end: int, major: int = 0, minor: int = 0) -> Array | int:
+        """
+        Coordinates from start to end along the major axis of a segment, or along its minor axis if major is given:
+        start + ceil((k * minor - major // 2) / major) towards end at step k, computed as one floor division.
+        """
+        step = 1 if end > start else -1
+        if not major:
+            return self.xp.arange(start, end + step, step)
+        if not minor:
+            return start
+
+        offset = start * major + (major - 1 - major // 2 if step > 0 else major // 2)
+        return self.xp.arange(offset, offset + step * minor * (major + 1), step * minor) // major
+
+    # --------------------------------------------------------------------------------
+    def _draw_lines_vectorized(self, x1: Array, y1: Array, x2: Array, y2: Array, colors: Array,
+                               per_segment_colors: bool):
+        dx = self.xp.abs(x2 - x1)
+        dy = self.xp.abs(y2 - y1)
+        sx = self.xp.where(x2 > x1, 1, -1)
+        sy = self.xp.where(y2 > y1, 1, -1)
+
+        # Bresenham steps along the major axis and moves on the minor axis whenever the error term goes negative.
+        # After k steps it has moved ceil((k * minor - major // 2) / major) times on the minor axis.
+        x_major = dx > dy
+        major = self.xp.where(x_major, dx, dy)
+        minor = self.xp.where(x_major, dy, dx)
+
+        segment_index, k = self._enumerate_runs(major + 1)
+
+        major, minor, x_major = major[segment_index], minor[segment_index], x_major[segment_index]
+        m = -((major // 2 - k * minor) // self.xp.maximum(major, 1))
+
+        xs = x1[segment_index] + sx[segment_index] * self.xp.where(x_major, k, m)
+        ys = y1[segment_index] + sy[segment_index] * self.xp.where(x_major, m, k)
+        self.frame_buffer[xs, ys] = colors[segment_index] if per_segment_colors else colors
+
+    # --------------------------------------------------------------------------------
+    def _enumerate_runs(self, counts: Array) -> tuple[Array, Array]:
+        """
+        Flatten runs of counts[i] items into a single range.
+        Returns, for every item, the index of its run and its position within that run.
+        """
+        run_index = self.xp.repeat(self.xp.arange(len(counts)), counts)
+        starts = self.xp.cumsum(counts) - counts
+        return run_index, self.xp.arange(len(run_index)) - starts[run_index]
+
+    # --------------------------------------------------------------------------------
+    def draw_rectangle(self, x: int, y: int, width: int, height: int, color: Array,
                        fill: bool = False) -> "Screen":
         # Bounds checking
         if x < 0 or y < 0 or width <= 0 or height <= 0:
@@ -183,283 +566,587 @@ class Screen:
 
         if fill:
             self.frame_buffer[x_start:x_end, y_start:y_end] = color
+            self._mark_dirty(x_start, y_start, x_end - x_start, y_end - y_start)
         else:
-            self.draw_line(x, y, x + width - 1, y, color)  # Top
-            self.draw_line(x, y + height - 1, x + width - 1, y + height - 1, color)  # Bottom
-            self.draw_line(x, y, x, y + height - 1, color)  # Left
-            self.draw_line(x + width - 1, y, x + width - 1, y + height - 1, color)  # Right
+            right, bottom = x + width - 1, y + height - 1
+            self.draw_lines(self.xp.asarray([[x, y, right, y],  # Top
+                                        [x, bottom, right, bottom],  # Bottom
+                                        [x, y, x, bottom],  # Left
+                                        [right, y, right, bottom]]),  # Right
+                            color)
 
         return self
 
     # --------------------------------------------------------------------------------
-    def _compute_out_code(self, x, y, width, height):
-        code = self._INSIDE
-        if x < 0:
-            code |= self._LEFT
-        elif x >= width:
-            code |= self._RIGHT
-        if y < 0:
-            code |= self._TOP
-        elif y >= height:
-            code |= self._BOTTOM
+    def _compute_out_code(self, x: Array, y: Array, width: int, height: int) -> Array:
+        code = self.xp.where(x < 0, self._LEFT, self.xp.where(x >= width, self._RIGHT, self._INSIDE))
+        code |= self.xp.where(y < 0, self._TOP, self.xp.where(y >= height, self._BOTTOM, self._INSIDE))
         return code
 
     # --------------------------------------------------------------------------------
-    def _cohen_sutherland_clip(self, x1, y1, x2, y2, width, height):
+    def _clip_segment(self, x1: int, y1: int, x2: int, y2: int) -> Optional[tuple[int, int, int, int]]:
+        """Clip one segment to the screen like _cohen_sutherland_clip, None if it is completely outside."""
+        width, height = self.resolution.width, self.resolution.height
+
+        def out_code(x: int, y: int) -> int:
+            return ((self._LEFT if x < 0 else self._RIGHT if x >= width else self._INSIDE)
+                    | (self._TOP if y < 0 else self._BOTTOM if y >= height else self._INSIDE))
+
+        out_code1, out_code2 = out_code(x1, y1), out_code(x2, y2)
+        while out_code1 | out_code2:
+            if out_code1 & out_code2:
+                return None
+
+            out_code_out = out_code1 or out_code2
+            x, y = (x1, y1) if out_code1 else (x2, y2)
+            if out_code_out & (self._TOP | self._BOTTOM):
+                y_new = 0 if out_code_out & self._TOP else height - 1
+                x_new = round(x + (x2 - x1) * (y_new - y) / (y2 - y1))
+            else:
+                x_new = width - 1 if out_code_out & self._RIGHT else 0
+                y_new = round(y + (y2 - y1) * (x_new - x) / (x2 - x1))
+
+            if out_code1:
+                x1, y1 = x_new, y_new
+                out_code1 = out_code(x1, y1)
+            else:
+                x2, y2 = x_new, y_new
+                out_code2 = out_code(x2, y2)
+        return x1, y1, x2, y2
+
+    # --------------------------------------------------------------------------------
+    def _cohen_sutherland_clip(self, segments: Array, width: int, height: int) -> tuple[Array, Array]:
+        """
+        Clip an (N, 4) array of segments to the screen, all segments at once.
+        Returns the clipped segments and a mask of the ones that are (at least partly) visible.
+        """
+        x1, y1, x2, y2 = (c.copy() for c in segments.T)
         out_code1 = self._compute_out_code(x1, y1, width, height)
         out_code2 = self._compute_out_code(x2, y2, width, height)
 
         while True:
-            if not (out_code1 | out_code2):
-                # Both points inside
-                return x1, y1, x2, y2
-            elif out_code1 & out_code2:
-                # Line is completely outside
-                return None
-            else:
-                # At least one point is outside
-                if out_code1:
-                    out_code_out = out_code1
-                    x, y = x1, y1
-                else:
-                    out_code_out = out_code2
-                    x, y = x2, y2
-
-                x_new, y_new = 0, 0
-                if out_code_out & self._TOP:
-                    x_new = x + (x2 - x1) * (0 - y) / (y2 - y1)
-                    y_new = 0
-                elif out_code_out & self._BOTTOM:
-                    x_new = x + (x2 - x1) * (height - 1 - y) / (y2 - y1)
-                    y_new = height - 1
-                elif out_code_out & self._RIGHT:
-                    y_new = y + (y2 - y1) * (width - 1 - x) / (x2 - x1)
-                    x_new = width - 1
-                elif out_code_out & self._LEFT:
-                    y_new = y + (y2 - y1) * (0 - x) / (x2 - x1)
-                    x_new = 0
-
-                if out_code_out == out_code1:
-                    x1, y1 = int(round(x_new)), int(round(y_new))
-                    out_code1 = self._compute_out_code(x1, y1, width, height)
-                else:
-                    x2, y2 = int(round(x_new)), int(round(y_new))
-                    out_code2 = self._compute_out_code(x2, y2, width, height)
+            # Segments with both points inside are accepted, those completely outside are rejected
+            pending = ((out_code1 | out_code2) != 0) & ((out_code1 & out_code2) == 0)
+            if not bool(pending.any()):
+                break
+
+            # Clip the first point that is outside
+            first = out_code1 != 0
+            out_code_out = self.xp.where(first, out_code1, out_code2)
+            x = self.xp.where(first, x1, x2)
+            y = self.xp.where(first, y1, y2)
+
+            # Rows that don't take a branch are masked out below, they only need a non-zero divisor
+            delta_x = x2 - x1
+            delta_y = y2 - y1
+            safe_dx = self.xp.where(delta_x == 0, 1, delta_x)
+            safe_dy = self.xp.where(delta_y == 0, 1, delta_y)
+
+            top = (out_code_out & self._TOP) != 0
+            bottom = ~top & ((out_code_out & self._BOTTOM) != 0)
+            right = ~top & ~bottom & ((out_code_out & self._RIGHT) != 0)
+
+            y_edge = self.xp.where(top, 0, height - 1)
+            x_edge = self.xp.where(right, width - 1, 0)
+            horizontal = top | bottom
+            x_new = self.xp.where(horizontal, x + delta_x * (y_edge - y) / safe_dy, x_edge)
+            y_new = self.xp.where(horizontal, y_edge, y + delta_y * (x_edge - x) / safe_dx)
+            x_new = self.xp.round(x_new).astype(self.xp.int64)
+            y_new = self.xp.round(y_new).astype(self.xp.int64)
+
+            update1 = pending & first
+            update2 = pending & ~first
+            x1 = self.xp.where(update1, x_new, x1)
+            y1 = self.xp.where(update1, y_new, y1)
+            x2 = self.xp.where(update2, x_new, x2)
+            y2 = self.xp.where(update2, y_new, y2)
+            out_code1 = self._compute_out_code(x1, y1, width, height)
+            out_code2 = self._compute_out_code(x2, y2, width, height)
+
+        visible = (out_code1 | out_code2) == 0
+        return self.xp.stack((x1, y1, x2, y2), axis=1), visible
 
     # --------------------------------------------------------------------------------
     def draw_arc(self, cx: int, cy: int, radius: int, angle_start: int, angle_end: int,
-                 color: xp.ndarray) -> "Screen":
-        """Draw an arc by plotting points along a circular path within angle range."""
-        if radius <= 0:
+                 color: Array, thickness: int = 1, pie: bool = False) -> "Screen":
+        """
+        Draw the part of a circle between two angles, in degrees, clockwise from the x axis (y points down).
+        angle_end may be smaller than angle_start for arcs that cross 0°, e.g. (330°, 30°).
+        With pie=True the circular sector is filled.
+        """
+        return self.draw_arcs(self.xp.asarray([[cx, cy]]), radius, self.xp.asarray([angle_start, angle_end]), color,
+                              thickness, pie)
+
+    # --------------------------------------------------------------------------------
+    def draw_arcs(self, centers: Array, radii: Array, angles: Array, colors: Array,
+                  thickness: int = 1, pie: bool = False) -> "Screen":
+        """
+        Draw many arcs in one pass. centers is an (N, 2) array, radii a single radius or one per arc,
+        angles a single (start, end) pair or an (N, 2) array of them, colors a single color or an (N, 3) array.
+        Thin arcs are sampled along their angle range, all at once. Thick arcs and pies are rasterized like circles,
+        then masked by the angle of every pixel.
+        """
+        centers = self.xp.asarray(centers, dtype=self.xp.int64).reshape(-1, 2)
+        radii = self.xp.broadcast_to(self.xp.asarray(radii, dtype=self.xp.int64), (len(centers),))
+        angles = self.xp.broadcast_to(self.xp.asarray(angles, dtype=self.xp.float64), (len(centers), 2))
+        colors = self.xp.asarray(colors)
+        if colors.ndim == 2:
+            colors = colors[radii > 0]
+        centers, angles, radii = centers[radii > 0], angles[radii > 0], radii[radii > 0]
+
+        # Support for angles like (330°, 30°)
+        starts, ends = angles[:, 0], angles[:, 1]
+        ends = self.xp.where(ends < starts, ends + 360, ends)
+
+        bounds = self._ellipse_bounds(centers, radii, radii, max(thickness, 0))
+        if bounds is None:
             return self  # Nothing to draw
 
-        x_max, y_max = self.resolution.width, self.resolution.height
+        if pie or thickness < 0:
+            self._draw_masked_arcs(centers, radii, starts, ends - starts, colors, -1, True)
+        elif thickness > 1:
+            self._draw_masked_arcs(centers, radii, starts, ends - starts, colors, thickness, False)
+        else:
+            self._draw_sampled_arcs(centers, radii, self.xp.radians(starts), self.xp.radians(ends), colors)
 
-        # Convert degrees to radians
-        rad_start = math.radians(angle_start)
-        rad_end = math.radians(angle_end)
+        self._mark_dirty(*bounds)
+        return self
 
-        # Normalize angle range
-        if rad_end < rad_start:
-            rad_end += 2 * math.pi  # Support for angles like (330°, 30°)
+    # --------------------------------------------------------------------------------
+    def _draw_sampled_arcs(self, centers: Array, radii: Array, rad_starts: Array, rad_ends: Array, colors: Array):
+        """Plot 8 * radius + 1 points along each arc, with the same arithmetic as a per-point loop."""
+        if self._kernels is not None:
+            self._kernels.draw_sampled_arcs(self.frame_buffer, centers, radii, rad_starts, rad_ends,
+                                            self._per_item_colors(colors, len(centers)))
+            return
+
+        steps = self.xp.maximum(8 * radii, 1)  # More steps = smoother arc
+        arc_index, step = self._enumerate_runs(steps + 1)
+        delta_angle = (rad_ends - rad_starts) / steps
+        theta = rad_starts[arc_index] + step * delta_angle[arc_index]
+        xs = (centers[arc_index, 0] + radii[arc_index] * self.xp.cos(theta)).astype(self.xp.int64)
+        ys = (centers[arc_index, 1] + radii[arc_index] * self.xp.sin(theta)).astype(self.xp.int64)
+
+        # Neighbouring samples mostly land on the same pixel: write each pixel once, and only the visible ones
+        keep = (xs >= 0) & (xs < self.resolution.width) & (ys >= 0) & (ys < self.resolution.height)
+        keep[1:] &= (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1]) | (arc_index[1:] != arc_index[:-1])
+        self.frame_buffer[xs[keep], ys[keep]] = colors[arc_index[keep]] if colors.ndim == 2 else colors
 
-        steps = max(8 * radius, 1)  # More steps = smoother arc
-        delta_angle = (rad_end - rad_start) / steps
+    # --------------------------------------------------------------------------------
+    def _draw_masked_arcs(self, centers: Array, radii: Array, starts: Array, spans: Array, colors: Array,
+                          thickness: int, pie: bool):
+        """Circle pixels (see draw_circles) whose angle, in degrees, is within the span of their arc."""
+        if self._kernels is not None:
+            self._kernels.draw_masked_arcs(self.frame_buffer, centers, radii, starts, spans,
+                                           self._per_item_colors(colors, len(centers)), thickness, pie)
+            return
+
+        pixels = self._enumerate_ellipse_pixels(centers, radii, radii, thickness)
+        if pixels is None:
+            return
+
+        arc_index, xs, ys, _ = pixels
+        dx, dy = xs - centers[arc_index, 0], ys - centers[arc_index, 1]
+        radius = radii[arc_index]
+        mask = self._ellipse_mask(dx, dy, radius, radius, thickness)
+        arc_index, xs, ys, dx, dy = arc_index[mask], xs[mask], ys[mask], dx[mask], dy[mask]
+
+        # Angles are only computed for the pixels of the circles. Past 360°, the arc is the whole circle.
+        angle = self.xp.degrees(self.xp.arctan2(dy, dx)) % 360
+        mask = ((angle - starts[arc_index]) % 360 <= spans[arc_index]) | (spans[arc_index] >= 360)
+        if pie:
+            mask |= (dx == 0) & (dy == 0)
+
+        arc_index = arc_index[mask]
+        self.frame_buffer[xs[mask], ys[mask]] = colors[arc_index] if colors.ndim == 2 else colors
 
-        for i in range(steps + 1):
-            theta = rad_start + i * delta_angle
-            x = int(cx + radius * math.cos(theta))
-            y = int(cy + radius * math.sin(theta))
+    # --------------------------------------------------------------------------------
+    def _per_item_colors(self, colors: Array, count: int) -> np.ndarray:
+        """(count, 3) uint8 colors for the raster kernels, from one color or one per item."""
+        colors = colors.astype(np.uint8)
+        return colors if colors.ndim == 2 else np.broadcast_to(colors, (count, 3))
 
-            # Skip out-of-bounds points
-            if 0 <= x < x_max and 0 <= y < y_max:
-                self.set_pixel(x, y, color)
+    # --------------------------------------------------------------------------------
+    def draw_circle(self, cx: int, cy: int, radius: int, color: Array, thickness: int = 1) -> "Screen":
 
-        return self
+        return self.draw_ellipse(cx, cy, radius, radius, color, thickness)
 
     # --------------------------------------------------------------------------------
-    def draw_circle(self, cx: int, cy: int, radius: int, color: xp.ndarray, thickness: int = 1) -> "Screen":
+    def draw_circles(self, centers: Array, radii: Array, colors: Array,
+                     thickness: int = -1) -> "Screen":
+        """
+        Draw many circles in one pass. centers is an (N, 2) array, radii a single radius or one per circle,
+        colors a single color or an (N, 3) array. Circles are filled unless thickness >= 0.
+        """
+        centers = self.xp.asarray(centers, dtype=self.xp.int64).reshape(-1, 2)
+        radii = self.xp.broadcast_to(self.xp.asarray(radii, dtype=self.xp.int64), (len(centers),))
+        return self._draw_ellipses(centers, radii, radii, self.xp.asarray(colors), thickness)
 
-        return self.draw_ellipse(cx, cy, radius, radius, color, thickness)
+    # --------------------------------------------------------------------------------
+    def draw_ellipses(self, centers: Array, radii: Array, colors: Array, thickness: int | Array = 1) -> "Screen":
+        """
+        Draw many ellipses in one call, like draw_ellipse. centers is an (N, 2) array, radii a single (rx, ry) pair
+        or an (N, 2) array, colors a single color or an (N, 3) array, thickness a single one or one per ellipse.
+        """
+        centers = self.xp.asarray(centers, dtype=self.xp.int64).reshape(-1, 2)
+        radii = self.xp.broadcast_to(self.xp.asarray(radii, dtype=self.xp.int64).reshape(-1, 2), (len(centers), 2))
+        if self.xp.ndim(thickness):
+            thickness = self.xp.asarray(thickness, dtype=self.xp.int64)
+        return self._draw_ellipses(centers, radii[:, 0], radii[:, 1], self.xp.asarray(colors), thickness)
 
     # --------------------------------------------------------------------------------
-    def draw_ellipse(self, cx: int, cy: int, rx: int, ry: int, color: xp.ndarray, thickness: int = 1) -> "Screen":
-        """Draw an ellipse using polar coordinates"""
+    def _draw_ellipses(self, centers: Array, rx: Array, ry: Array, colors: Array, thickness: int | Array) -> "Screen":
+        if self._kernels is not None:
+            bounds = self._ellipse_bounds(centers, rx, ry, thickness)
+            if bounds is not None:
+                self._kernels.draw_ellipses(self.frame_buffer, centers, rx, ry, np.broadcast_to(thickness, rx.shape),
+                                            self._per_item_colors(colors, len(centers)))
+                self._mark_dirty(*bounds)
+            return self
 
-        if thickness < 0:
-            return self._draw_elipse_filled(cx, cy, rx, ry, color)
-        else:
-            return self._draw_ellipse_outlined(cx, cy, rx, ry, color, thickness)
+        if not self.backend.gpu:
+            boxes = self.xp.stack(self._ellipse_boxes(centers, rx, ry, thickness), axis=1)
+            if float(((boxes[:, 1] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 2])).mean()) > self._SMALL_ELLIPSE_AREA:
+                bounds = self._ellipse_bounds(centers, rx, ry, thickness)
+                if bounds is not None:
+                    self._draw_ellipse_boxes(boxes, centers, rx, ry, colors, thickness)
+                    self._mark_dirty(*bounds)
+                return self
+
+        pixels = self._enumerate_ellipse_pixels(centers, rx, ry, thickness)
+        if pixels is None:
+            return self
+
+        ellipse_index, xs, ys, bounds = pixels
+        mask = self._ellipse_mask(xs - centers[ellipse_index, 0], ys - centers[ellipse_index, 1],
+                                  rx[ellipse_index], ry[ellipse_index],
+                                  thickness[ellipse_index] if self.xp.ndim(thickness) else thickness)
+
+        ellipse_index = ellipse_index[mask]
+        self.frame_buffer[xs[mask], ys[mask]] = colors[ellipse_index] if colors.ndim == 2 else colors
+        self._mark_dirty(*bounds)
+
+        return self
+
+    # --------------------------------------------------------------------------------
+    def _draw_ellipse_boxes(self, boxes: Array, centers: Array, rx: Array, ry: Array, colors: Array,
+                            thickness: int | Array):
+        """
+        Ellipse by ellipse, over open grids of their (N, 4) bounding boxes from _ellipse_boxes (see draw_ellipse).
+        On the CPU, that costs less than gathering the parameters of every pixel of a flat batch of large ellipses.
+        """
+        thicknesses = self.xp.broadcast_to(thickness, rx.shape)
+        for i, (x_start, x_end, y_start, y_end) in enumerate(boxes.tolist()):
+            if x_start >= x_end or y_start >= y_end or rx[i] <= 0 or ry[i] <= 0:
+                continue
+            cx, cy = int(centers[i, 0]), int(centers[i, 1])
+            dx, dy = self.xp.ogrid[x_start - cx:x_end - cx, y_start - cy:y_end - cy]
+            mask = self._ellipse_mask(dx, dy, int(rx[i]), int(ry[i]), int(thicknesses[i]))
+            self.frame_buffer[x_start:x_end, y_start:y_end][mask] = colors[i] if colors.ndim == 2 else colors
 
     # --------------------------------------------------------------------------------
-    def _draw_elipse_filled(self, cx: int, cy: int, rx: int, ry: int, color: xp.ndarray) -> "Screen":
+    def _ellipse_boxes(self, centers: Array, rx: Array, ry: Array, thickness: int | Array) -> tuple[Array, ...]:
+        """Visible part of the bounding box of each ellipse: x_start, x_end, y_start, y_end."""
+        margin = self.xp.maximum(thickness, 0) + 1
+        cx, cy = centers.T
+        x_start = self.xp.clip(cx - rx - margin, 0, self.resolution.width)
+        x_end = self.xp.clip(cx + rx + margin + 1, 0, self.resolution.width)
+        y_start = self.xp.clip(cy - ry - margin, 0, self.resolution.height)
+        y_end = self.xp.clip(cy + ry + margin + 1, 0, self.resolution.height)
+        return x_start, x_end, y_start, y_end
 
-        # Ellipse equation (shifted to center)
-        ellipse = ((self._x_grid - cx) / rx) ** 2 + ((self._y_grid - cy) / ry) ** 2
+    # --------------------------------------------------------------------------------
+    def _ellipse_bounds(self, centers: Array, rx: Array, ry: Array,
+                        thickness: int | Array) -> Optional[tuple[int, int, int, int]]:
+        """x, y, width, height of the visible region covered by ellipses, None if none of them is visible."""
+        x_start, x_end, y_start, y_end = self._ellipse_boxes(centers, rx, ry, thickness)
+        visible = (rx > 0) & (ry > 0) & (x_end > x_start) & (y_end > y_start)
+        if not bool(visible.any()):
+            return None
+        x_min, y_min = int(x_start[visible].min()), int(y_start[visible].min())
+        return x_min, y_min, int(x_end[visible].max()) - x_min, int(y_end[visible].max()) - y_min
+
+    # --------------------------------------------------------------------------------
+    def _enumerate_ellipse_pixels(self, centers: Array, rx: Array, ry: Array, thickness: int | Array
+                                  ) -> Optional[tuple[Array, Array, Array, tuple[int, int, int, int]]]:
+        """
+        Every visible pixel of the bounding box of each ellipse: ellipse index, x, y, and the bounds of the region
+        they cover. None if no ellipse is visible.
+        """
+        x_start, x_end, y_start, y_end = self._ellipse_boxes(centers, rx, ry, thickness)
+        box_heights = y_end - y_start
+
+        # Only the visible part of each bounding box is enumerated
+        counts = self.xp.where((rx > 0) & (ry > 0), (x_end - x_start) * box_heights, 0)
+        ellipse_index, offset = self._enumerate_runs(counts)
+        if not len(ellipse_index):
+            return None
+
+        box_heights = box_heights[ellipse_index]
+        xs = x_start[ellipse_index] + offset // box_heights
+        ys = y_start[ellipse_index] + offset % box_heights
+        return ellipse_index, xs, ys, self._ellipse_bounds(centers, rx, ry, thickness)
 
-        # Create mask (automatically handles out-of-bounds)
-        mask = ellipse <= 1.0
+    # --------------------------------------------------------------------------------
+    def draw_ellipse(self, cx: int, cy: int, rx: int, ry: int, color: Array, thickness: int = 1) -> "Screen":
+        """Draw an ellipse, filled if thickness < 0. Only its bounding box is evaluated."""
+        if rx <= 0 or ry <= 0:
+            return self
 
-        # Apply color to all channels
-        self.frame_buffer[mask] = color
+        margin = max(thickness, 0) + 1
+        x_start, x_end = max(0, cx - rx - margin), min(self.resolution.width, cx + rx + margin + 1)
+        y_start, y_end = max(0, cy - ry - margin), min(self.resolution.height, cy + ry + margin + 1)
+        if x_start >= x_end or y_start >= y_end:
+            return self  # Ellipse completely outside
 
-        # Handle completely filled small ellipses
-        del ellipse, mask
-        # if xp.__name__ != "numpy":
-        #     xp.get_default_memory_pool().free_all_blocks()
+        # Open grids: (w, 1) and (1, h) offsets broadcast against each other instead of full-size index arrays
+        dx, dy = self.xp.ogrid[x_start - cx:x_end - cx, y_start - cy:y_end - cy]
+        mask = self._ellipse_mask(dx, dy, rx, ry, thickness)
+
+        self.frame_buffer[x_start:x_end, y_start:y_end][mask] = color
+        self._mark_dirty(x_start, y_start, x_end - x_start, y_end - y_start)
 
         return self
 
     # --------------------------------------------------------------------------------
-    def _draw_ellipse_outlined(self, cx: int, cy: int, rx: int, ry: int, color: xp.ndarray,
-                               thickness: int) -> "Screen":
+    def _ellipse_mask(self, dx: Array, dy: Array, rx, ry, thickness) -> Array:
+        """
+        Select the pixels of an ellipse from their offsets to its center.
+        rx, ry and thickness are scalars or arrays broadcastable with the offsets.
+        """
+        if self.xp.ndim(thickness):
+            # One thickness per pixel: the pixels of filled ellipses only take the ellipse equation, as with a single
+            # negative thickness, the others the outline distances
+            dx, dy, rx, ry, thickness = self.xp.broadcast_arrays(dx, dy, self.xp.asarray(rx), self.xp.asarray(ry),
+                                                                 thickness)
+            filled = thickness < 0
+            outlined = ~filled
+            mask = self.xp.empty(filled.shape, dtype=bool)
+            mask[filled] = (dx[filled] / rx[filled]) ** 2 + (dy[filled] / ry[filled]) ** 2 <= 1.0
+            mask[outlined] = self._ellipse_outline_mask(dx[outlined], dy[outlined], rx[outlined], ry[outlined],
+                                                        thickness[outlined])
+            return mask
 
+        if thickness < 0:
+            # Ellipse equation (shifted to center)
+            return (dx / rx) ** 2 + (dy / ry) ** 2 <= 1.0
+        return self._ellipse_outline_mask(dx, dy, rx, ry, thickness)
 
+    # --------------------------------------------------------------------------------
+    def _ellipse_outline_mask(self, dx: Array, dy: Array, rx, ry, thickness) -> Array:
         # Calculate normalized distance from ellipse boundary
         # This gives us exact pixel distances from the edge
-        distance = xp.sqrt((self._x_grid - cx) ** 2 * ry ** 2 + (self._y_grid - cy) ** 2 * rx ** 2) - (rx * ry)
+        distance = self.xp.sqrt(dx ** 2 * ry ** 2 + dy ** 2 * rx ** 2) - (rx * ry)
 
         # Convert distance to pixels
-        distance_px = distance / xp.clip(xp.sqrt(rx ** 2 * ((self._y_grid - cy) / ry) ** 2 + ry ** 2 * ((self._x_grid - cx) / rx) ** 2),
-                                         1e-6, None)
+        distance_px = distance / self.xp.clip(self.xp.sqrt(rx ** 2 * (dy / ry) ** 2 + ry ** 2 * (dx / rx) ** 2), 1e-6, None)
 
-        # Create mask for outline
-        if thickness <= 1:
-            # For thin outlines, use exact boundary
-            mask = xp.abs(distance_px) <= 0.5
-        else:
-            # For thicker outlines, create band
-            outer = distance_px <= (thickness / 2)
-            inner = distance_px <= -(thickness / 2)
-            mask = outer & ~inner
+        # Array conditions: CuPy's where() doesn't take a Python bool
+        rx, ry, thickness = self.xp.asarray(rx), self.xp.asarray(ry), self.xp.asarray(thickness)
 
-        # Handle completely filled small ellipses
-        if thickness >= min(rx, ry):
-            mask = distance <= 0
+        # Thin outlines use the exact boundary, thicker ones a band around it
+        half = thickness / 2
+        mask = self.xp.where(thickness <= 1,
+                        self.xp.abs(distance_px) <= 0.5,
+                        (distance_px <= half) & (distance_px > -half))
 
-        self.frame_buffer[mask] = color
+        # Handle completely filled small ellipses
+        return self.xp.where(thickness >= self.xp.minimum(rx, ry), distance <= 0, mask)
 
-        # Remove if performance is an issue
-        del distance, distance_px, outer, inner, mask
-        # if xp.__name__ != "numpy":
-        #     xp.get_default_memory_pool().free_all_blocks()
+    # --------------------------------------------------------------------------------
+    def _max_bezier_samples(self) -> int:
+        """
+        Most samples per curve: enough for a pixel-accurate curve that goes several times around the screen, while
+        a control point millions of pixels away costs the same.
+        """
+        return 4 * (self.resolution.width + self.resolution.height)
 
-        return self
+    # --------------------------------------------------------------------------------
+    def _flatten_beziers(self, control_points: Array) -> tuple[Array, Array]:
+        """
+        Flatten an (N, degree + 1, 2) array of Bézier curves into polylines, all curves at once.
+        Each curve is sampled as many times as its control polygon is long, which is an upper bound of its length,
+        so consecutive samples are at most about a pixel apart. A far away control point doesn't make that count
+        unbounded: it is capped at _max_bezier_samples(), and longer curves are flattened into longer segments.
+        Returns the integer points of all the polylines, consecutive duplicates removed, and the curve of each point.
+        """
+        control_points = control_points.astype(self.xp.float64)
+        degree = control_points.shape[1] - 1
+
+        polygon_length = self.xp.sqrt((self.xp.diff(control_points, axis=1) ** 2).sum(axis=2)).sum(axis=1)
+        samples = self.xp.minimum(self.xp.ceil(polygon_length).astype(self.xp.int64) + 2, self._max_bezier_samples())
+        curve_index, step = self._enumerate_runs(samples)
+        t = (step / (samples[curve_index] - 1))[:, None]
+
+        # Bernstein basis, one column per control point
+        i = self.xp.arange(degree + 1)
+        binomials = self.xp.asarray([math.comb(degree, k) for k in range(degree + 1)])
+        basis = binomials * t ** i * (1 - t) ** (degree - i)
+
+        points = (basis[:, :, None] * control_points[curve_index]).sum(axis=1).astype(self.xp.int64)
+
+        # Drop the samples that land on the same pixel as the previous one of the same curve
+        keep = self.xp.ones(len(points), dtype=bool)
+        keep[1:] = (points[1:] != points[:-1]).any(axis=1) | (curve_index[1:] != curve_index[:-1])
+        return points[keep], curve_index[keep]
 
     # --------------------------------------------------------------------------------
-    @staticmethod
-    def _bezier_quadratic(t, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int):
-        x = (1 - t) ** 2 * p0x + 2 * (1 - t) * t * p1x + t ** 2 * p2x
-        y = (1 - t) ** 2 * p0y + 2 * (1 - t) * t * p1y + t ** 2 * p2y
-        return int(x), int(y)
+    def draw_beziers(self, control_points: Array, colors: Array) -> "Screen":
+        """
+        Draw a batch of Bézier curves of the same degree in one raster pass.
+        control_points is an (N, degree + 1, 2) array, colors a single color or an (N, 3) array.
+        """
+        control_points = self.xp.asarray(control_points)
+        if not len(control_points):
+            return self
+
+        if self._kernels is not None:
+            degree = control_points.shape[1] - 1
+            binomials = np.array([math.comb(degree, k) for k in range(degree + 1)], dtype=np.float64)
+            segments, curve_index = self._kernels.flatten_beziers(control_points.astype(np.float64), binomials,
+                                                                  self._max_bezier_samples())
+            colors = self.xp.asarray(colors)
+            return self.draw_lines(segments, colors[curve_index] if colors.ndim == 2 else colors)
+
+        points, curve_index = self._flatten_beziers(control_points)
+
+        # Link every point to the previous one of its curve. The first point of a curve is linked to itself,
+        # which also draws curves that collapse onto a single pixel.
+        previous = self.xp.arange(len(points)) - 1
+        first = self.xp.ones(len(points), dtype=bool)
+        first[1:] = curve_index[1:] != curve_index[:-1]
+        previous[first] = self.xp.arange(len(points))[first]
+        segments = self.xp.concatenate((points[previous], points), axis=1)
+
+        colors = self.xp.asarray(colors)
+        return self.draw_lines(segments, colors[curve_index] if colors.ndim == 2 else colors)
 
     # --------------------------------------------------------------------------------
-    def draw_quadratic_bezier(self, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int,
-                              color: xp.ndarray) -> "Screen":
-        """Draw a quadratic Bézier curve (P0, P1, P2) with smooth interpolation"""
-        t = 0.0
-        prev_x, prev_y = self._bezier_quadratic(t, p0x, p0y, p1x, p1y, p2x, p2y)
-        while t < 1.0:
-            # Adaptive step size based on local curve flatness
-            dt = 0.001  # minimum step
-            next_t = min(t + dt, 1.0)
-            next_x, next_y = self._bezier_quadratic(next_t, p0x, p0y, p1x, p1y, p2x, p2y)
-
-            # Increase step if next point is close
-            while next_t < 1.0 and (next_x == prev_x and next_y == prev_y):
-                next_t = min(next_t + dt, 1.0)
-                next_x, next_y = self._bezier_quadratic(next_t, p0x, p0y, p1x, p1y, p2x, p2y)
-
-            self.draw_line(prev_x, prev_y, next_x, next_y, color)
-            prev_x, prev_y = next_x, next_y
-            t = next_t
+    def draw_quadratic_beziers(self, curves: Array, colors: Array) -> "Screen":
+        """Draw quadratic Bézier curves given as an (N, 6) array of p0x, p0y, p1x, p1y, p2x, p2y"""
+        return self.draw_beziers(self.xp.asarray(curves).reshape(-1, 3, 2), colors)
 
-        return self
+    # --------------------------------------------------------------------------------
+    def draw_cubic_beziers(self, curves: Array, colors: Array) -> "Screen":
+        """Draw cubic Bézier curves given as an (N, 8) array of p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y"""
+        return self.draw_beziers(self.xp.asarray(curves).reshape(-1, 4, 2), colors)
 
     # --------------------------------------------------------------------------------
-    @staticmethod
-    def _bezier_cubic(t, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int, p3x: int, p3y: int):
-        x = (1 - t) ** 3 * p0x + 3 * (1 - t) ** 2 * t * p1x + 3 * (1 - t) * t ** 2 * p2x + t ** 3 * p3x
-        y = (1 - t) ** 3 * p0y + 3 * (1 - t) ** 2 * t * p1y + 3 * (1 - t) * t ** 2 * p2y + t ** 3 * p3y
-        return int(x), int(y)
+    def draw_quadratic_bezier(self, p0x: int, p0y: int, p1x: int, p1y: int, p2x: int, p2y: int,
+                              color: Array) -> "Screen":
+        """Draw a quadratic Bézier curve (P0, P1, P2)"""
+        return self.draw_quadratic_beziers(self.xp.asarray([[p0x, p0y, p1x, p1y, p2x, p2y]]), color)
 
     # --------------------------------------------------------------------------------
     def draw_cubic_bezier(self, p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y, color) -> "Screen":
-        """Draw a cubic Bézier curve (P0, P1, P2, P3) with smooth interpolation"""
-        t = 0.0
-        prev_x, prev_y = self._bezier_cubic(t, p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y)
-        while t < 1.0:
-            dt = 0.001  # base step
-            next_t = min(t + dt, 1.0)
-            next_x, next_y = self._bezier_cubic(next_t, p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y)
-
-            while next_t < 1.0 and (next_x == prev_x and next_y == prev_y):
-                next_t = min(next_t + dt, 1.0)
-                next_x, next_y = self._bezier_cubic(next_t, p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y)
-
-            self.draw_line(prev_x, prev_y, next_x, next_y, color)
-            prev_x, prev_y = next_x, next_y
-            t = next_t
-
-        return self
+        """Draw a cubic Bézier curve (P0, P1, P2, P3)"""
+        return self.draw_cubic_beziers(self.xp.asarray([[p0x, p0y, p1x, p1y, p2x, p2y, p3x, p3y]]), color)
 
     # --------------------------------------------------------------------------------
     def draw_text(self, text: str, x: int, y: int,
-                  color: xp.ndarray,
+                  color: Array,
                   antialias: bool = True,
                   line_spacing: int = 1,
                   font: Optional[pg.font.Font] = None,
-                  bg_color: Optional[xp.ndarray] = None,
-                  next_write_position: Optional[list[int]] = None) -> "Screen":
-        """Efficiently draw multiline text at (x, y) using batch transfer to GPU (W, H, 3 layout)."""
+                  bg_color: Optional[Array] = None,
+                  next_write_position: Optional[list[int]] = None,
+                  kerning: bool = False) -> "Screen":
+        """
+        Draw multiline text at (x, y).
+        Lines are composed from the glyph atlas of the font and alpha blended in one pass, so the cost depends on the
+        number of glyphs, not on the number of distinct strings.
+        With kerning, the text is rendered as a whole by pygame instead, which applies the kerning of the font.
+        """
+        font = font or self._get_default_font()
+        if kerning:
+            return self._draw_rendered_text(text, x, y, color, antialias, line_spacing, font, bg_color,
+                                            next_write_position)
+
+        atlas = self._get_glyph_atlas(font, antialias)
+        color = self.xp.asarray(color, dtype=self.xp.uint16)
+        current_y = y
+        max_x = x
+        for line in text.split("\n"):
+            coverage = atlas.compose(line)
+            w, h = coverage.shape
+            max_x = x + w
+
+            x_start, x_end = max(0, x), min(self.resolution.width, max_x)
+            y_start, y_end = max(0, current_y), min(self.resolution.height, current_y + h)
+            if x_start < x_end and y_start < y_end:
+                target = self.frame_buffer[x_start:x_end, y_start:y_end]
+                if bg_color is not None:
+                    target[:] = bg_color
+                alpha = coverage[x_start - x:x_end - x, y_start - current_y:y_end - current_y]
+                self._blend(target, color, alpha)
+                self._mark_dirty(x_start, y_start, x_end - x_start, y_end - y_start)
+
+            current_y += font.get_linesize() + line_spacing
+
+        if next_write_position is not None:
+            next_write_position[:] = [max_x + 1, current_y - font.get_linesize() - line_spacing]
+
+        return self
+
+    # --------------------------------------------------------------------------------
+    def _blend(self, target: Array, color: Array, alpha: Array):
+        """Alpha blend a color (or an image of the same size) over target in place, in integer arithmetic."""
+        alpha = alpha[..., None].astype(self.xp.uint16)
+        target[:] = (color * alpha + target * (255 - alpha) + 127) // 255
+
+    # --------------------------------------------------------------------------------
+    def _get_glyph_atlas(self, font: pg.font.Font, antialias: bool) -> GlyphAtlas:
+        try:
+            return self.glyph_atlases[(font, antialias)]
+        except KeyError:
+            atlas = GlyphAtlas(font, antialias, self.backend)
+            self.glyph_atlases[(font, antialias)] = atlas
+            return atlas
+
+    # --------------------------------------------------------------------------------
+    def _get_default_font(self) -> pg.font.Font:
+        if self._default_font is None:
+            self._default_font = pg.font.Font(None, 24)
+        return self._default_font
+
+    # --------------------------------------------------------------------------------
+    def _draw_rendered_text(self, text: str, x: int, y: int,
+                            color: Array,
+                            antialias: bool,
+                            line_spacing: int,
+                            font: pg.font.Font,
+                            bg_color: Optional[Array],
+                            next_write_position: Optional[list[int]]) -> "Screen":
+        """Draw text rendered as a whole by pygame (W, H, 3 layout)."""
         current_y = y
         if not text.strip():
             current_y += font.get_linesize() + line_spacing
             return self
 
-        color_cpu = tuple(color.get().tolist()) if xp.__name__ != "numpy" \
-            else tuple(color.tolist())
-        bg_color_cpu = tuple(bg_color.get().tolist()) if xp.__name__ != "numpy" and bg_color is not None \
-            else tuple(bg_color.tolist()) if bg_color is not None else None
+        color_cpu = tuple(self.backend.asnumpy(color).tolist())
+        bg_color_cpu = tuple(self.backend.asnumpy(bg_color).tolist()) if bg_color is not None else None
 
-        # Get or render text surface
-        surface = self.get_cached_text((text, antialias, color_cpu, bg_color_cpu, font))
-        width, height = surface.get_size()
+        # Get or render the text, already converted to arrays on the compute backend
+        rgb_xp, alpha_xp = self.get_cached_text((text, antialias, color_cpu, bg_color_cpu, font))
+        width, height = rgb_xp.shape[:2]
 
         if current_y + height < 0 or current_y >= self.resolution.height:
             current_y += height + line_spacing
             return self
 
-        # Get raw image and alpha channel from Pygame surface (shape: (W, H, 3) and (W, H))
-        surface = surface.convert_alpha()
-        rgb_xp = pg.surfarray.array3d(surface)  # shape: (W, H, 3)
-        alpha_xp = pg.surfarray.array_alpha(surface)  # shape: (W, H)
-
-        # Convert to GPU arrays
-        if xp.__name__ != "numpy":
-            rgb_xp = xp.asarray(rgb_xp, dtype=xp.uint8)
-            alpha_xp = xp.asarray(alpha_xp, dtype=xp.uint8)
-
         # Compute dimensions
-        w, h = rgb_xp.shape[:2]
-        max_x = min(self.resolution.width, x + w)
-        max_y = min(self.resolution.height, current_y + h)
+        max_x = min(self.resolution.width, x + width)
+        max_y = min(self.resolution.height, current_y + height)
         draw_width = max_x - x
         draw_height = max_y - current_y
         if draw_width <= 0 or draw_height <= 0:
             current_y += height + line_spacing
             return self
 
-        # Slice only visible area
-        rgb_xp = rgb_xp[:draw_width, :draw_height]
-        alpha_xp = alpha_xp[:draw_width, :draw_height]
-
-        # Alpha mask
-        mask = alpha_xp > 0
-
-        # Apply masked text
+        # Blend only the visible area
         target_slice = self.frame_buffer[x:max_x, current_y:max_y]  # Shape: (W, H, 3)
-        target_slice[mask] = rgb_xp[mask]
+        self._blend(target_slice, rgb_xp[:draw_width, :draw_height], alpha_xp[:draw_width, :draw_height])
+        self._mark_dirty(x, current_y, draw_width, draw_height)
 
         if next_write_position is not None:
             next_write_position[:] = [max_x+1, current_y]
@@ -468,26 +1155,196 @@ class Screen:
 
     # --------------------------------------------------------------------------------
     def get_cached_text(self,
-                        key: tuple[str, bool, tuple, tuple, pg.font.Font]) -> Surface:
-        try:
-            return self.cached_texts[key]
-        except KeyError:
-            text, aliasing, color, bg_color, font = key
-            surface = font.render(text, aliasing, color, bg_color)
-            self.cached_texts[key] = surface
-            return surface
-        # TODO: Maybe fix a size limit for the text surface cache ?0
+                        key: tuple[str, bool, tuple, tuple, pg.font.Font]) -> tuple[Array, Array]:
+        """Return the (rgb, alpha) arrays of a rendered text, rendering and converting it only on a cache miss."""
+        return self.cached_texts.get_or_render(key, lambda: self._render_text(*key))
+
+    # --------------------------------------------------------------------------------
+    def _render_text(self, text: str, antialias: bool, color: tuple, bg_color: Optional[tuple],
+                     font: pg.font.Font) -> tuple[Array, Array]:
+        # Antialiased text without background has per-pixel alpha, other text a color key or no transparency at all
+        rgb, alpha = surface_to_arrays(font.render(text, antialias, color, bg_color))
+        if alpha is None:
+            alpha = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+
+        return self.xp.asarray(rgb, dtype=self.xp.uint8), self.xp.asarray(alpha, dtype=self.xp.uint8)
+
+    # --------------------------------------------------------------------------------
+    def blit(self, sprite: Hashable | Texture, x: int, y: int, alpha: Optional[int] = None) -> "Screen":
+        """
+        Draw a texture, or the texture with that id in self.textures, with its top left corner at (x, y).
+        Its alpha channel is blended in integer arithmetic, alpha (0 to 255) multiplies it for translucent sprites.
+        """
+        texture = sprite if isinstance(sprite, Texture) else self.textures[sprite]
+
+        # Clip the sprite to the screen
+        x_start, y_start = max(x, 0), max(y, 0)
+        x_end, y_end = min(x + texture.width, self.resolution.width), min(y + texture.height, self.resolution.height)
+        if x_start >= x_end or y_start >= y_end:
+            return self  # Sprite completely outside
+
+        target = self.frame_buffer[x_start:x_end, y_start:y_end]
+        source = (slice(x_start - x, x_end - x), slice(y_start - y, y_end - y))
+        coverage = self._sprite_alpha(texture, alpha, source)
+        if coverage is None:
+            target[...] = texture.rgb[source]
+        else:
+            self._blend(target, texture.rgb[source], coverage)
+
+        self._mark_dirty(x_start, y_start, x_end - x_start, y_end - y_start)
+        return self
+
+    # --------------------------------------------------------------------------------
+    def blit_many(self, sprites: Sequence[Hashable | Texture] | Hashable | Texture, positions: Array,
+                  alpha: Optional[int] = None) -> "Screen":
+        """
+        Draw many sprites at once, e.g. the tiles of a tile map. positions is an (N, 2) array of top left corners,
+        sprites one texture (or id) for all of them or one per position.
+        All the copies of a texture are drawn in one scatter. Translucent sprites of the same call are blended
+        over the frame as it was before the call, not over each other.
+        """
+        positions = np.asarray(self.backend.asnumpy(positions), dtype=np.int64).reshape(-1, 2)
+        # Ids can be tuples: a sequence is one sprite per position only if it isn't itself a stored id
+        if (isinstance(sprites, Texture) or not isinstance(sprites, (list, tuple, np.ndarray))
+                or isinstance(sprites, tuple) and sprites in self.textures):
+            sprites = [sprites] * len(positions)
+
+        # Group the positions by texture
+        groups: dict[int, tuple[Texture, list[int]]] = {}
+        for index, sprite in enumerate(sprites):
+            texture = sprite if isinstance(sprite, Texture) else self.textures[sprite]
+            groups.setdefault(id(texture), (texture, []))[1].append(index)
+
+        for texture, indices in groups.values():
+            x, y = positions[indices].T
+            # Skip the copies that are completely outside
+            visible = ((x + texture.width > 0) & (x < self.resolution.width)
+                       & (y + texture.height > 0) & (y < self.resolution.height))
+            if not visible.any():
+                continue
+            x, y = x[visible], y[visible]
+
+            # (copies, W, H) pixel coordinates of every copy, and the ones on screen
+            xs = self.xp.asarray(x)[:, None, None] + self.xp.arange(texture.width)[None, :, None]
+            ys = self.xp.asarray(y)[:, None, None] + self.xp.arange(texture.height)[None, None, :]
+            xs, ys = self.xp.broadcast_arrays(xs, ys)
+            on_screen = (xs >= 0) & (xs < self.resolution.width) & (ys >= 0) & (ys < self.resolution.height)
+            xs, ys = xs[on_screen], ys[on_screen]
+
+            rgb = self.xp.broadcast_to(texture.rgb, (len(x),) + texture.rgb.shape)[on_screen]
+            coverage = self._sprite_alpha(texture, alpha, (slice(None), slice(None)))
+            if coverage is None:
+                self.frame_buffer[xs, ys] = rgb
+            else:
+                coverage = self.xp.broadcast_to(coverage, (len(x),) + coverage.shape)[on_screen]
+                target = self.frame_buffer[xs, ys]
+                self._blend(target, rgb, coverage)
+                self.frame_buffer[xs, ys] = target
+
+            x_min, y_min = max(int(x.min()), 0), max(int(y.min()), 0)
+            x_max = min(int(x.max()) + texture.width, self.resolution.width)
+            y_max = min(int(y.max()) + texture.height, self.resolution.height)
+            self._mark_dirty(x_min, y_min, x_max - x_min, y_max - y_min)
+
+        return self
+
+    # --------------------------------------------------------------------------------
+    def _sprite_alpha(self, texture: Texture, alpha: Optional[int], source: tuple[slice, slice]) -> Optional[Array]:
+        """Coverage of a region of a texture with the global alpha applied, None if it is fully opaque."""
+        if alpha is None or alpha >= 255:
+            return texture.alpha[source] if texture.alpha is not None else None
+        if texture.alpha is None:
+            return self.xp.full(texture.rgb[source].shape[:2], max(alpha, 0), dtype=self.xp.uint8)
+        return ((texture.alpha[source].astype(self.xp.uint16) * max(alpha, 0) + 127) // 255).astype(self.xp.uint8)
 
     # --------------------------------------------------------------------------------
     def clear(self):
         """Clear the screen."""
-        self.fill(xp.array([0, 0, 0]))
+        self.fill(self.xp.array([0, 0, 0]))
+
+    # --------------------------------------------------------------------------------
+    @contextmanager
+    def batch(self) -> Iterator[CommandBuffer]:
+        """
+        Record drawing commands instead of executing them one by one.
+        They are executed when the frame is accepted, one vectorized pass per primitive.
+        """
+        commands = CommandBuffer()
+        yield commands
+        # Drawn into the layer that was current when it was recorded
+        with self._dirty_lock:
+            self._pending_batches.append((commands, getattr(self._local, "layer", None)))
+
+    # --------------------------------------------------------------------------------
+    def execute(self, commands: CommandBuffer) -> "Screen":
+        """Draw recorded commands now. The same command buffer can be executed on every frame."""
+        commands.execute(self)
+        return self
 
     # --------------------------------------------------------------------------------
     def accept_frame(self):
+        """
+        Submit the frame drawn so far for presentation and continue drawing on the next buffer, which already holds
+        the same image. While the screen refreshes, this waits when too many frames are queued, except on the
+        thread that refreshes the screen (e.g. from an input listener): the oldest queued frame is dropped instead.
+        """
+        with self._dirty_lock:
+            batches, self._pending_batches = self._pending_batches, []
+        for commands, layer in batches:
+            with self.layer(layer) if layer in self.layers else nullcontext():
+                commands.execute(self)
+
         with self._dirty_lock:
-            self._dirty = True
+            rects, self._dirty_rects = self._dirty_rects, []
+            if self.layers:
+                # A region drawn in any layer is composited again from all of them
+                for layer in self.layers.values():
+                    rects = merge_dirty_rects(rects, layer.dirty_rects, self._MAX_DIRTY_RECTS)
+                    layer.dirty_rects = []
+                for rect in rects:
+                    self._compose(rect)
+
+        # Submitting may wait for the presenter, which may itself be drawing: the lock must not be held meanwhile
+        if self.recorder is not None:
+            self.recorder.capture(self._back_buffer, rects)
+        self._back_buffer = self._swap_chain.submit(rects)
+
+    # --------------------------------------------------------------------------------
+    def start_recording(self, path: str | PathLike[str], format: str = "png", delta: bool = True,
+                        queue_size: int = 8, block: bool = False) -> FrameRecorder:
+        """
+        Record every accepted frame from a background thread, see FrameRecorder for the formats.
+        With block=False, frames are skipped rather than slowing the rendering down when the writer falls behind.
+        """
+        self.stop_recording()
+        self.recorder = FrameRecorder(path, (self.resolution.width, self.resolution.height), self.backend,
+                                      format, delta, queue_size, block)
+        return self.recorder
+
+    # --------------------------------------------------------------------------------
+    def stop_recording(self):
+        """Write the frames still queued and close the recording."""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    # --------------------------------------------------------------------------------
+    def start_input_recording(self, path: str | PathLike[str]) -> InputRecorder:
+        """Record the inputs received by the input devices, see replay_inputs() to play them back."""
+        self.stop_input_recording()
+        self.input_recorder = InputRecorder(path, self.input_devices)
+        return self.input_recorder
+
+    # --------------------------------------------------------------------------------
+    def stop_input_recording(self):
+        input_recorder, self.input_recorder = self.input_recorder, None
+        if input_recorder is not None:
+            input_recorder.close()
 
     # --------------------------------------------------------------------------------
     def export_frame(self, abs_path: str | PathLike[str]):
-        pg.image.save(self.screen, abs_path)
+        """Save the last accepted frame, as it is displayed at the current brightness, to an image file."""
+        frame = self._swap_chain.front
+        frame = frame if self.brightness == 1.0 else self.xp.take(self._brightness_lut, frame)
+        frame = self.backend.asnumpy(frame)
+        pg.image.save(pg.surfarray.make_surface(frame), abs_path)
@@ -0,0 +1,190 @@
+################################################################################
+import time
+from collections import deque
+from threading import Condition, get_ident
+from typing import Optional
+
+import pygame as pg
+from util.compute_backend import Array, ComputeBackend, get_backend
+
+################################################################################
+def add_dirty_rect(rects: list[pg.Rect], rect: pg.Rect, max_rects: int = 32) -> list[pg.Rect]:
+    """
+    Add a region to a list of dirty regions, merging it with the ones it overlaps or touches.
+    Past max_rects disjoint regions, the list collapses to their union.
+    """
+    merged = True
+    while merged:
+        merged = False
+        # Touching regions are merged too, so that curves don't end up as hundreds of tiny rects
+        grown = rect.inflate(2, 2)
+        for i, other in enumerate(rects):
+            if grown.colliderect(other):
+                rect = rect.union(rects.pop(i))
+                merged = True
+                break
+    rects.append(rect)
+
+    if len(rects) > max_rects:
+        return [rects[0].unionall(rects[1:])]
+    return rects
+
+# --------------------------------------------------------------------------------
+def merge_dirty_rects(rects: list[pg.Rect], others: list[pg.Rect], max_rects: int = 32) -> list[pg.Rect]:
+    rects = list(rects)
+    for rect in others:
+        rects = add_dirty_rect(rects, rect, max_rects)
+    return rects
+
+################################################################################
+class SwapChain:
+    """
+    A set of frame buffers passed between the producers, who draw into the back buffer, and the presenter.
+    Submitting the back buffer queues it for presentation and hands the producers another buffer, without copying
+    whole frames: a buffer only gets the regions that changed since it was last drawn into.
+    The present queue is bounded by the number of buffers, which gives producers backpressure, except on the
+    presenting thread: it can't wait for itself, so its submissions drop the oldest queued frame instead.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, shape: tuple[int, ...], buffer_count: int = 3,
+                 backend: Optional[str | ComputeBackend] = None):
+        if buffer_count < 2:
+            raise ValueError(f"A swap chain needs at least 2 buffers, got {buffer_count}")
+
+        xp = get_backend(backend).xp
+        self._buffers = [xp.zeros(shape, dtype=xp.uint8) for _ in range(buffer_count)]
+        # Regions in which each buffer is behind the latest submitted frame
+        self._stale: list[list[pg.Rect]] = [[] for _ in range(buffer_count)]
+        self._back = 0
+        self._latest: Optional[int] = None
+        self._presenting: Optional[int] = None
+        # Thread that acquires the frames, and regions to present again once the frame being presented is released
+        self._presenter_thread: Optional[int] = None
+        self._represent: list[pg.Rect] = []
+        self._free: list[int] = list(range(1, buffer_count))
+        # Queued frames: buffer index, regions that changed, time at which it was submitted
+        self._queue: deque[tuple[int, list[pg.Rect], float]] = deque()
+        self._condition = Condition()
+        # Producers only wait for a free buffer while a presenter is consuming frames
+        self.blocking = False
+
+    # --------------------------------------------------------------------------------
+    @property
+    def back(self) -> Array:
+        return self._buffers[self._back]
+
+    # --------------------------------------------------------------------------------
+    @property
+    def front(self) -> Array:
+        """The most recently submitted frame."""
+        return self._buffers[self._back if self._latest is None else self._latest]
+
+    # --------------------------------------------------------------------------------
+    def set_blocking(self, blocking: bool):
+        with self._condition:
+            self.blocking = blocking
+            self._condition.notify_all()
+
+    # --------------------------------------------------------------------------------
+    def submit(self, rects: list[pg.Rect]) -> Array:
+        """
+        Queue the back buffer for presentation and return the new back buffer.
+        When every buffer is in use, either wait for the presenter to release one or, when not blocking,
+        drop the oldest queued frame and carry its regions over to the next one.
+        """
+        now = time.perf_counter()
+        with self._condition:
+            on_presenter = get_ident() == self._presenter_thread
+            while not self._free and (self.blocking and not on_presenter or not self._queue):
+                if on_presenter:
+                    raise RuntimeError("Every buffer is in use and the presenting thread can't wait for itself")
+                self._condition.wait()
+
+            if self._free:
+                new_back = self._free.pop()
+            else:
+                # The next frame also carries the submission time of the dropped one, its changes waited since then
+                new_back, dropped_rects, submitted_at = self._queue.popleft()
+                if self._queue:
+                    index, next_rects, _ = self._queue[0]
+                    self._queue[0] = (index, merge_dirty_rects(dropped_rects, next_rects), submitted_at)
+                else:
+                    rects = merge_dirty_rects(dropped_rects, rects)
+                    now = submitted_at
+
+            submitted = self._back
+            self._queue.append((submitted, rects, now))
+            self._latest = submitted
+            for index, stale in enumerate(self._stale):
+                if index != submitted:
+                    self._stale[index] = merge_dirty_rects(stale, rects)
+
+            # Bring the new back buffer up to date, region by region
+            source, target = self._buffers[submitted], self._buffers[new_back]
+            for rect in self._stale[new_back]:
+                target[rect.left:rect.right, rect.top:rect.bottom] = source[rect.left:rect.right, rect.top:rect.bottom]
+            self._stale[new_back] = []
+
+            self._back = new_back
+            self._condition.notify_all()
+            return target
+
+    # --------------------------------------------------------------------------------
+    def acquire(self, timeout: Optional[float] = 0) -> Optional[tuple[Array, list[pg.Rect], float]]:
+        """
+        Take the next queued frame, the regions to present and the time.perf_counter() at which it was submitted,
+        or None if no frame was submitted in time.
+        The buffer belongs to the presenter until release() is called.
+        """
+        with self._condition:
+            if not self._queue and timeout != 0:
+                self._condition.wait_for(lambda: self._queue, timeout)
+            if not self._queue or self._presenting is not None:
+                return None
+
+            index, rects, submitted_at = self._queue.popleft()
+            self._presenting = index
+            self._presenter_thread = get_ident()
+            return self._buffers[index], rects, submitted_at
+
+    # --------------------------------------------------------------------------------
+    def represent(self, rects: list[pg.Rect]):
+        """
+        Present regions of the latest submitted frame again, e.g. after the brightness changed, without submitting
+        the back buffer that producers may be drawing into.
+        """
+        with self._condition:
+            self._represent_latest(rects)
+            self._condition.notify_all()
+
+    # --------------------------------------------------------------------------------
+    def _represent_latest(self, rects: list[pg.Rect]):
+        latest = self._latest
+        if latest is not None:
+            if self._queue:
+                # The latest frame is the last one queued
+                index, queued_rects, submitted_at = self._queue[-1]
+                self._queue[-1] = (index, merge_dirty_rects(queued_rects, rects), submitted_at)
+            elif self._presenting == latest:
+                self._represent = merge_dirty_rects(self._represent, rects)
+            else:
+                # Taken back from the producers until it is presented
+                self._free.remove(latest)
+                self._queue.append((latest, list(rects), time.perf_counter()))
+
+    # --------------------------------------------------------------------------------
+    def release(self):
+        """Give the frame being presented back to the producers."""
+        with self._condition:
+            if self._presenting is not None:
+                presented, self._presenting = self._presenting, None
+                rects, self._represent = self._represent, []
+                if rects and presented == self._latest:
+                    self._queue.append((presented, rects, time.perf_counter()))
+                else:
+                    self._free.append(presented)
+                    if rects:
+                        # A newer frame was submitted meanwhile: present the regions from it instead
+                        self._represent_latest(rects)
+                self._condition.notify_all()
@@ -0,0 +1,89 @@
+################################################################################
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable, Optional
+
+from util.compute_backend import Array
+
+################################################################################
+class TextCache:
+    """
+    LRU cache of rendered texts, bounded by the memory of the arrays it holds.
+    Entries are (rgb, alpha) arrays already on the compute backend, ready to be blended into a frame.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, capacity_bytes: int = 64 * 1024 * 1024):
+        self.capacity_bytes = capacity_bytes
+        self._entries: OrderedDict[Hashable, tuple[Array, Array]] = OrderedDict()
+        self._lock = Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --------------------------------------------------------------------------------
+    def get(self, key: Hashable) -> Optional[tuple[Array, Array]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    # --------------------------------------------------------------------------------
+    def put(self, key: Hashable, rgb: Array, alpha: Array):
+        size = rgb.nbytes + alpha.nbytes
+        if size > self.capacity_bytes:
+            return  # Would evict everything else and still not fit
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0].nbytes + previous[1].nbytes
+
+            # Evict the least recently used entries until the new one fits
+            while self._entries and self.bytes + size > self.capacity_bytes:
+                _, (old_rgb, old_alpha) = self._entries.popitem(last=False)
+                self.bytes -= old_rgb.nbytes + old_alpha.nbytes
+                self.evictions += 1
+
+            self._entries[key] = (rgb, alpha)
+            self.bytes += size
+
+    # --------------------------------------------------------------------------------
+    def get_or_render(self, key: Hashable,
+                      render: Callable[[], tuple[Array, Array]]) -> tuple[Array, Array]:
+        entry = self.get(key)
+        if entry is None:
+            entry = render()
+            self.put(key, *entry)
+        return entry
+
+    # --------------------------------------------------------------------------------
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    # --------------------------------------------------------------------------------
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "capacity_bytes": self.capacity_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._entries)
+
+    # --------------------------------------------------------------------------------
+    def __contains__(self, key: Hashable):
+        return key in self._entries
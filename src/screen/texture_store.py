@@ -0,0 +1,119 @@
+################################################################################
+from os import PathLike
+from threading import Lock
+from typing import Hashable, Optional
+
+import numpy as np
+import pygame as pg
+from PIL import Image
+from util.compute_backend import Array, ComputeBackend, get_backend
+
+# --------------------------------------------------------------------------------
+def surface_to_arrays(surface: pg.Surface) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """(W, H, 3) colors and (W, H) alpha of a pygame surface, alpha is None if the surface is opaque."""
+    rgb = pg.surfarray.array3d(surface)
+    # Per-pixel alpha, a color key or no transparency at all
+    if surface.get_flags() & pg.SRCALPHA:
+        return rgb, pg.surfarray.array_alpha(surface)
+    if surface.get_colorkey() is not None:
+        return rgb, pg.surfarray.array_colorkey(surface)
+    return rgb, None
+
+################################################################################
+class Texture:
+    """An image resident on a compute backend: (W, H, 3) colors and (W, H) alpha, None if fully opaque."""
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, rgb: Array, alpha: Optional[Array] = None):
+        self.rgb = rgb
+        self.alpha = alpha
+
+    # --------------------------------------------------------------------------------
+    @property
+    def width(self) -> int:
+        return self.rgb.shape[0]
+
+    # --------------------------------------------------------------------------------
+    @property
+    def height(self) -> int:
+        return self.rgb.shape[1]
+
+    # --------------------------------------------------------------------------------
+    @property
+    def nbytes(self) -> int:
+        return self.rgb.nbytes + (self.alpha.nbytes if self.alpha is not None else 0)
+
+################################################################################
+class TextureStore:
+    """
+    Textures kept on the compute backend by id, so they are uploaded once and blitted every frame.
+    Images are loaded with Pillow. A texture whose alpha is 255 everywhere is stored as opaque and blitted
+    as a plain copy.
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, backend: Optional[str | ComputeBackend] = None):
+        self.xp = get_backend(backend).xp
+        self._textures: dict[Hashable, Texture] = {}
+        self._lock = Lock()
+        self.bytes = 0
+
+    # --------------------------------------------------------------------------------
+    def add(self, texture_id: Hashable, rgb: np.ndarray, alpha: Optional[np.ndarray] = None) -> Texture:
+        """Upload (W, H, 3) colors and optional (W, H) alpha, replacing the texture with the same id."""
+        if alpha is not None and bool((np.asarray(alpha) == 255).all()):
+            alpha = None
+        texture = Texture(self.xp.asarray(rgb, dtype=self.xp.uint8),
+                          self.xp.asarray(alpha, dtype=self.xp.uint8) if alpha is not None else None)
+
+        with self._lock:
+            previous = self._textures.pop(texture_id, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._textures[texture_id] = texture
+            self.bytes += texture.nbytes
+        return texture
+
+    # --------------------------------------------------------------------------------
+    def load(self, texture_id: Hashable, path: str | PathLike[str]) -> Texture:
+        """Load an image file of any format Pillow reads."""
+        with Image.open(path) as image:
+            rgba = np.asarray(image.convert("RGBA"))  # (H, W, 4)
+        rgba = rgba.transpose(1, 0, 2)  # Frame buffer layout: (W, H)
+        return self.add(texture_id, rgba[:, :, :3], rgba[:, :, 3])
+
+    # --------------------------------------------------------------------------------
+    def add_surface(self, texture_id: Hashable, surface: pg.Surface) -> Texture:
+        return self.add(texture_id, *surface_to_arrays(surface))
+
+    # --------------------------------------------------------------------------------
+    def get(self, texture_id: Hashable) -> Optional[Texture]:
+        return self._textures.get(texture_id)
+
+    # --------------------------------------------------------------------------------
+    def __getitem__(self, texture_id: Hashable) -> Texture:
+        try:
+            return self._textures[texture_id]
+        except KeyError:
+            raise KeyError(f"No texture with id {texture_id!r}") from None
+
+    # --------------------------------------------------------------------------------
+    def remove(self, texture_id: Hashable):
+        with self._lock:
+            texture = self._textures.pop(texture_id, None)
+            if texture is not None:
+                self.bytes -= texture.nbytes
+
+    # --------------------------------------------------------------------------------
+    def clear(self):
+        with self._lock:
+            self._textures.clear()
+            self.bytes = 0
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._textures)
+
+    # --------------------------------------------------------------------------------
+    def __contains__(self, texture_id: Hashable):
+        return texture_id in self._textures
@@ -1,12 +1,15 @@
 ################################################################################
 import random
-from util.compute_backend import xp
+from typing import Optional
+
+from util.compute_backend import Array, ComputeBackend, get_backend
 
 ################################################################################
-def hex_to_rgb(hex_code) -> xp.ndarray:
+def hex_to_rgb(hex_code, backend: Optional[str | ComputeBackend] = None) -> Array:
     """
     Convert a hex color string to RGB tuple.
     Supports formats: '#RRGGBB', 'RRGGBB', '#RGB', 'RGB'
+    The array is on the given compute backend, or the default one.
     """
     hex_code = hex_code.lstrip('#')
 
@@ -16,15 +19,15 @@ def hex_to_rgb(hex_code) -> xp.ndarray:
     if len(hex_code) != 6:
         raise ValueError(f"Invalid hex color code: {hex_code}")
 
-    return xp.array((
+    return get_backend(backend).xp.array((
         int(hex_code[0:2], 16),  # Red
         int(hex_code[2:4], 16),  # Green
         int(hex_code[4:6], 16)  # Blue
     ))
 
 # --------------------------------------------------------------------------------
-def random_color_rgb() -> xp.ndarray:
-    return xp.array((
+def random_color_rgb(backend: Optional[str | ComputeBackend] = None) -> Array:
+    return get_backend(backend).xp.array((
         random.randint(0, 255),
         random.randint(0, 255),
         random.randint(0, 255)
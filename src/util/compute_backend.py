@@ -1,28 +1,184 @@
 ################################################################################
+import os
+from threading import Lock
+from typing import Callable, Optional, Union
+
 import numpy as np
 
+# Name of the backend to use when none is given, e.g. VIRTUAL_COMPUTER_BACKEND=numpy
+BACKEND_ENV_VAR = "VIRTUAL_COMPUTER_BACKEND"
+
+# An array of any backend
+Array = Union[np.ndarray, "cupy.ndarray"]
+
 ################################################################################
-def get_compute_backend():
+class BackendUnavailableError(RuntimeError):
+    pass
+
+################################################################################
+class ComputeBackend:
     """
-    Returns Cupy module if an Nvidia GPU is detected and the CUDA Toolkit is installed.
-    If not, the Numpy module is returned."
+    An array module with a NumPy compatible API (xp) and the few operations that differ between array modules.
+    The base class is the NumPy backend.
     """
-    try:
-        import cupy as cp
+
+    name = "numpy"
+    gpu = False
+
+    # --------------------------------------------------------------------------------
+    def __init__(self):
+        self.xp = np
+        # Compiles a scalar Python function to native code, when the backend supports it
+        self.jit: Optional[Callable] = None
+
+    # --------------------------------------------------------------------------------
+    def asnumpy(self, array: Array) -> np.ndarray:
+        """Copy of an array in host memory (no copy if it already is)."""
+        return np.asarray(array)
+
+    # --------------------------------------------------------------------------------
+    def synchronize(self):
+        """Wait for the queued work to complete."""
+        pass
+
+    # --------------------------------------------------------------------------------
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+################################################################################
+class CupyBackend(ComputeBackend):
+    """Nvidia GPU arrays. Requires CuPy, a GPU and the CUDA Toolkit."""
+
+    name = "cupy"
+    gpu = True
+
+    # --------------------------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        try:
+            import cupy
+        except ImportError as e:
+            raise BackendUnavailableError("CuPy is not installed") from e
+
         try:
-            if cp.cuda.runtime.getDeviceCount() > 0:
-                # Try a basic GPU operation to ensure CUDA libraries are available
-                _ = cp.arange(1)
-                print("Using Nvidia GPU")
-                return cp
-            else:
-                print("No Nvidia GPU detected. Falling back to CPU.")
-                return np
+            device_count = cupy.cuda.runtime.getDeviceCount()
         except Exception as e:
-            print(f"CUDA error: {e}. \nMake sure the CUDA Toolkit is correctly installed. \nFalling back to CPU.")
-            return np
-    except ImportError:
-        print("CuPy not installed. Falling back to CPU.")
-        return np
+            raise BackendUnavailableError(f"CUDA error: {e}. Make sure the CUDA Toolkit is correctly installed") from e
+        if device_count == 0:
+            raise BackendUnavailableError("No Nvidia GPU detected")
+
+        try:
+            # Try a basic GPU operation to ensure CUDA libraries are available
+            _ = cupy.arange(1)
+        except Exception as e:
+            raise BackendUnavailableError(f"CUDA error: {e}. Make sure the CUDA Toolkit is correctly installed") from e
+        self.xp = cupy
+
+    # --------------------------------------------------------------------------------
+    def asnumpy(self, array: Array) -> np.ndarray:
+        return self.xp.asnumpy(array)
+
+    # --------------------------------------------------------------------------------
+    def synchronize(self):
+        self.xp.cuda.Device().synchronize()
+
+################################################################################
+class NumbaBackend(ComputeBackend):
+    """NumPy arrays, with the scalar raster loops compiled by Numba. Requires Numba."""
+
+    name = "numba"
+
+    # --------------------------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        try:
+            import numba
+        except ImportError as e:
+            raise BackendUnavailableError("Numba is not installed") from e
+        self.jit = numba.njit(cache=True, nogil=True)
+
+################################################################################
+_factories: dict[str, Callable[[], ComputeBackend]] = {
+    "numpy": ComputeBackend,
+    "cupy": CupyBackend,
+    "numba": NumbaBackend,
+}
+# Backends are created on first use, only once
+_backends: dict[str, ComputeBackend] = {}
+_errors: dict[str, BackendUnavailableError] = {}
+_default: Optional[str] = None
+_lock = Lock()
+
+# Tried in this order by the "auto" backend
+AUTO_ORDER = ("cupy", "numpy")
+
+# --------------------------------------------------------------------------------
+def register_backend(name: str, factory: Callable[[], ComputeBackend]):
+    """
+    Make a backend available under a name. factory is called the first time the backend is requested and
+    raises BackendUnavailableError if the backend can't run here.
+    """
+    with _lock:
+        _factories[name] = factory
+        _backends.pop(name, None)
+        _errors.pop(name, None)
+
+# --------------------------------------------------------------------------------
+def registered_backends() -> list[str]:
+    return list(_factories)
+
+# --------------------------------------------------------------------------------
+def set_default_backend(name: Optional[str]):
+    """Backend used when none is given. None goes back to the environment variable, or "auto"."""
+    if name is not None and name != "auto" and name not in _factories:
+        raise ValueError(f"Unknown compute backend {name!r}, expected one of {registered_backends()} or 'auto'")
+    global _default
+    _default = name
+
+# --------------------------------------------------------------------------------
+def get_backend(name: Optional[Union[str, ComputeBackend]] = None) -> ComputeBackend:
+    """
+    The backend with that name, created if needed.
+    Without a name: the default backend (set_default_backend(), else the VIRTUAL_COMPUTER_BACKEND environment
+    variable, else "auto"). "auto" is the first backend of AUTO_ORDER that can run here.
+    Raises BackendUnavailableError if the requested backend can't run here.
+    """
+    if isinstance(name, ComputeBackend):
+        return name
+
+    name = name or _default or os.environ.get(BACKEND_ENV_VAR) or "auto"
+    if name == "auto":
+        for candidate in AUTO_ORDER:
+            try:
+                return get_backend(candidate)
+            except BackendUnavailableError:
+                continue
+        raise BackendUnavailableError(f"None of the backends {AUTO_ORDER} can run here")
+
+    with _lock:
+        if name in _backends:
+            return _backends[name]
+        if name in _errors:
+            raise _errors[name]
+        if name not in _factories:
+            raise ValueError(f"Unknown compute backend {name!r}, expected one of {registered_backends()} or 'auto'")
+
+        try:
+            backend = _factories[name]()
+        except BackendUnavailableError as e:
+            _errors[name] = e
+            raise
+        _backends[name] = backend
+        return backend
+
+# --------------------------------------------------------------------------------
+def get_compute_backend():
+    """Array module of the default backend."""
+    return get_backend().xp
 
-xp = get_compute_backend()
+# --------------------------------------------------------------------------------
+def __getattr__(name: str):
+    # util.compute_backend.xp is resolved on first access only, not when this module is imported
+    if name == "xp":
+        return get_compute_backend()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")